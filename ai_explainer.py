@@ -2,37 +2,48 @@
 Módulo para gerar explicações para notícias usando a API da OpenAI.
 """
 import os
-import json
+import logging
 import time
+import hashlib
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
 from datetime import datetime
+import httpx
+import orjson
 import requests
+import tiktoken
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from http_retry import retry_on_transient_errors
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
-class AIExplainer:
-    """
-    Classe para gerar explicações para notícias usando a API da OpenAI.
-    """
+# Logger do módulo; sem configuração da aplicação, as mensagens são descartadas
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
-    def __init__(self):
-        """
-        Inicializa o explicador de IA.
-        """
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            print("Aviso: API key da OpenAI não encontrada. Usando explicações genéricas.")
+# Endpoint de chat da OpenAI
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
 
-        # Diretório para cache de explicações
-        self.cache_dir = os.path.join(os.getcwd(), "cache")
-        os.makedirs(self.cache_dir, exist_ok=True)
+# Modelo usado nas explicações e tamanho máximo do conteúdo da notícia enviado no prompt
+OPENAI_MODEL = "gpt-4"
+MAX_CONTENT_TOKENS = 600
 
-        # Carregar cache existente
-        self.cache = self._load_cache()
+# Número de explicações mantidas em memória além do banco SQLite
+HOT_CACHE_SIZE = 256
 
-        # Estilo para as explicações
-        self.style_prompt = """
+# Limites de uso da OpenAI por minuto (padrão: tier 1 do gpt-4)
+OPENAI_MAX_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_MAX_REQUESTS_PER_MINUTE", "500"))
+OPENAI_MAX_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_MAX_TOKENS_PER_MINUTE", "10000"))
+
+
+# Estilo para as explicações
+_STYLE_PROMPT = """
 "E aí cambada, tô de volta com o resumo dax últimax notíciax de cripto, bora lá? Com meu sotaque carioca bem característico, vamox falar sobre a mais recente 'baleia do mercado', que decidiu nadar nax águax do Bitcoin. Sabe o que isso significa, né? Isso mesmo, tá rolando um 'índice de acumulação' altíssimo. Pra quem não tá ligado no que é isso, é como se o 'papai noel' tivesse descido a chaminé mais cedo e deixado um presentão debaixo da árvore.
 
 Mas ó, não se iluda, hein? Investir em Bitcoin não é como acreditar em 'papai noel'. Tem que se ligar nox riscox, e não sair acreditando em promessa de retorno milagroso. Pra mim, tem aquele cheirinho de cilada quando a promessa é grande demais, sabe?
@@ -59,32 +70,296 @@ Características do meu estilo de fala:
 13. O nome do quadro é "Rapidinha Cripto" (sem o "no")
 """
 
-    def _load_cache(self):
+# Mensagem de sistema enviada em todas as requisições (instruções + exemplo de estilo)
+_SYSTEM_MSG = (
+    "Você é um assistente especializado em criar conteúdo sobre criptomoedas no estilo de Renato Santanna Silva, com seu característico sotaque carioca. Enfatize o chiado nos 's' finais das palavras (que soam como 'x'). Use 'cambada' em vez de 'galera', expressões de entusiasmo, analogias simples, tom conversacional, frases curtas e diretas, perguntas retóricas, referências a memes, e repetições características como 'tropa, tropa, tropa'."
+    f"\n\nExemplo do meu estilo:\n{_STYLE_PROMPT}"
+)
+
+
+# Partes fixas do corpo das requisições de chat, montadas uma única vez
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_MSG}
+_USER_INSTRUCTIONS = "\n\nIMPORTANTE: Limite sua resposta a no máximo 3-4 frases curtas. Seja direto, objetivo e use meu estilo característico com gírias e expressões."
+# Nas requisições com várias notícias o limite vale para cada explicação, não para a resposta inteira
+_MULTIPLEXED_INSTRUCTIONS = "\n\nIMPORTANTE: Limite cada explicação a no máximo 3-4 frases curtas. Seja direto, objetivo e use meu estilo característico com gírias e expressões."
+_REQUEST_TEMPLATE = {
+    "model": OPENAI_MODEL,
+    "max_tokens": 150,
+    "temperature": 0.8
+}
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """
+    Carrega (uma única vez) o tokenizador do modelo da OpenAI.
+
+    Returns:
+        tiktoken.Encoding: Tokenizador do modelo.
+    """
+    return tiktoken.encoding_for_model(OPENAI_MODEL)
+
+
+@lru_cache(maxsize=256)
+def count_tokens(text):
+    """
+    Conta os tokens de um texto com o tokenizador do modelo.
+
+    O resultado é memoizado, então a mensagem de sistema fixa só é tokenizada uma vez.
+
+    Args:
+        text (str): Texto a ser contado.
+
+    Returns:
+        int: Número de tokens.
+    """
+    return len(_get_encoding().encode(text))
+
+
+class RateLimiter:
+    """
+    Limitador de janela deslizante para requisições e tokens por minuto.
+
+    Mantém o instante e a quantidade estimada de tokens de cada requisição
+    feita na última janela e só bloqueia quando algum dos limites seria
+    ultrapassado, até que a entrada mais antiga expire.
+    """
+
+    def __init__(self, max_requests, max_tokens, window=60.0):
+        """
+        Inicializa o limitador.
+
+        Args:
+            max_requests (int): Número máximo de requisições por janela.
+            max_tokens (int): Número máximo de tokens por janela.
+            window (float): Duração da janela em segundos.
         """
-        Carrega o cache de explicações do disco.
+        self.max_requests = max_requests
+        self.max_tokens = max_tokens
+        self.window = window
+        self._entries = deque()
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        """
+        Tenta reservar espaço na janela atual.
+
+        Args:
+            tokens (int): Tokens estimados da requisição.
 
         Returns:
-            dict: Cache de explicações.
+            float: 0 se a reserva foi feita, ou os segundos até a próxima vaga.
         """
-        cache_file = os.path.join(self.cache_dir, "explanations_cache.json")
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Erro ao carregar cache: {e}")
-        return {}
+        with self._lock:
+            now = time.monotonic()
+            while self._entries and now - self._entries[0][0] >= self.window:
+                _, expired_tokens = self._entries.popleft()
+                self._tokens_in_window -= expired_tokens
+
+            within_requests = len(self._entries) < self.max_requests
+            # Uma requisição maior que o limite de tokens passa sozinha numa janela vazia
+            within_tokens = not self._entries or self._tokens_in_window + tokens <= self.max_tokens
+            if within_requests and within_tokens:
+                self._entries.append((now, tokens))
+                self._tokens_in_window += tokens
+                return 0.0
+
+            return self.window - (now - self._entries[0][0])
+
+    def acquire(self, tokens):
+        """
+        Bloqueia até que a requisição caiba nos limites.
 
-    def _save_cache(self):
+        Args:
+            tokens (int): Tokens estimados da requisição.
         """
-        Salva o cache de explicações no disco.
+        wait = self._reserve(tokens)
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._reserve(tokens)
+
+    async def acquire_async(self, tokens):
+        """
+        Versão assíncrona de `acquire`, que não bloqueia o event loop.
+
+        Args:
+            tokens (int): Tokens estimados da requisição.
+        """
+        wait = self._reserve(tokens)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._reserve(tokens)
+
+class AIExplainer:
+    """
+    Classe para gerar explicações para notícias usando a API da OpenAI.
+    """
+
+    def __init__(self):
+        """
+        Inicializa o explicador de IA.
+        """
+        self.api_key = os.getenv("OPENAI_API_KEY")
+
+        # Verificar a chave uma única vez; os demais métodos consultam apenas este indicador
+        self._has_key = bool(self.api_key)
+        if not self._has_key:
+            logger.warning("Aviso: API key da OpenAI não encontrada. Usando explicações genéricas.")
+
+        # Cabeçalhos montados uma única vez e reutilizados em todas as requisições
+        self._headers = {"Content-Type": "application/json"}
+        if self._has_key:
+            self._headers["Authorization"] = f"Bearer {self.api_key}"
+
+        # Sessão HTTP reutilizável (pool de conexões + keep-alive)
+        self.session = requests.Session()
+        self.session.headers.update(self._headers)
+        self.session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+        # Limitador de requisições/tokens por minuto
+        self.rate_limiter = RateLimiter(OPENAI_MAX_REQUESTS_PER_MINUTE, OPENAI_MAX_TOKENS_PER_MINUTE)
+
+        # Diretório para cache de explicações
+        self.cache_dir = os.path.join(os.getcwd(), "cache")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Cache persistente em SQLite (uma linha por explicação) com camada LRU em memória
+        self.cache_conn = sqlite3.connect(
+            os.path.join(self.cache_dir, "explanations.db"), check_same_thread=False
+        )
+        self.cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS explanations ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at INTEGER NOT NULL)"
+        )
+        self.cache_conn.commit()
+        self._hot_cache = OrderedDict()
+        self._migrate_legacy_cache()
+
+        # Estilo para as explicações
+        self.style_prompt = _STYLE_PROMPT
+
+    def _migrate_legacy_cache(self):
+        """
+        Importa o antigo cache em JSON para o banco SQLite, uma única vez.
         """
         cache_file = os.path.join(self.cache_dir, "explanations_cache.json")
+        if not os.path.exists(cache_file):
+            return
+
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=4)
+            with open(cache_file, 'rb') as f:
+                legacy_cache = orjson.loads(f.read())
+
+            now = int(time.time())
+            with self.cache_conn:
+                self.cache_conn.executemany(
+                    "INSERT OR IGNORE INTO explanations (key, value, created_at) VALUES (?, ?, ?)",
+                    [(self._cache_key(title), value, now) for title, value in legacy_cache.items()]
+                )
+            os.replace(cache_file, cache_file + ".migrated")
+            logger.info(f"Cache antigo migrado para SQLite: {len(legacy_cache)} explicações.")
         except Exception as e:
-            print(f"Erro ao salvar cache: {e}")
+            logger.error(f"Erro ao migrar cache: {e}")
+
+    @staticmethod
+    def _cache_key(title):
+        """
+        Gera a chave de cache de tamanho fixo para um título.
+
+        O título é normalizado (espaços e caixa) antes do hash para que a mesma
+        notícia com formatação diferente reaproveite a explicação.
+
+        Args:
+            title (str): Título da notícia.
+
+        Returns:
+            str: Hash hexadecimal de 32 caracteres.
+        """
+        normalized = " ".join(title.split()).lower()
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _get_cached(self, cache_key):
+        """
+        Busca uma explicação no cache.
+
+        Args:
+            cache_key (str): Chave da explicação.
+
+        Returns:
+            str: Explicação em cache, ou None se não existir.
+        """
+        if cache_key in self._hot_cache:
+            self._hot_cache.move_to_end(cache_key)
+            return self._hot_cache[cache_key]
+
+        try:
+            row = self.cache_conn.execute(
+                "SELECT value FROM explanations WHERE key = ?", (cache_key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao carregar cache: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        self._remember(cache_key, row[0])
+        return row[0]
+
+    def _set_cached(self, cache_key, explanation):
+        """
+        Grava uma explicação no cache.
+
+        Args:
+            cache_key (str): Chave da explicação.
+            explanation (str): Explicação a ser armazenada.
+        """
+        self._remember(cache_key, explanation)
+        try:
+            with self.cache_conn:
+                self.cache_conn.execute(
+                    "INSERT OR REPLACE INTO explanations (key, value, created_at) VALUES (?, ?, ?)",
+                    (cache_key, explanation, int(time.time()))
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao salvar cache: {e}")
+
+    def _set_cached_many(self, explanations):
+        """
+        Grava várias explicações no cache em uma única transação.
+
+        Args:
+            explanations (list): Tuplas (título, explicação).
+        """
+        if not explanations:
+            return
+
+        now = int(time.time())
+        rows = [(self._cache_key(title), explanation, now) for title, explanation in explanations]
+        for cache_key, explanation, _ in rows:
+            self._remember(cache_key, explanation)
+        try:
+            with self.cache_conn:
+                self.cache_conn.executemany(
+                    "INSERT OR REPLACE INTO explanations (key, value, created_at) VALUES (?, ?, ?)",
+                    rows
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao salvar cache: {e}")
+
+    def _remember(self, cache_key, explanation):
+        """
+        Mantém uma explicação na camada LRU em memória.
+
+        Args:
+            cache_key (str): Chave da explicação.
+            explanation (str): Explicação a ser mantida.
+        """
+        self._hot_cache[cache_key] = explanation
+        self._hot_cache.move_to_end(cache_key)
+        if len(self._hot_cache) > HOT_CACHE_SIZE:
+            self._hot_cache.popitem(last=False)
 
     def get_explanation(self, news_item):
         """
@@ -100,16 +375,16 @@ Características do meu estilo de fala:
         content = news_item.get("content", "")
 
         # Verificar se já temos uma explicação em cache
-        cache_key = title
-        if cache_key in self.cache:
-            print(f"Usando explicação em cache para: {title}")
-            return self.cache[cache_key]
+        cache_key = self._cache_key(title)
+        cached_explanation = self._get_cached(cache_key)
+        if cached_explanation is not None:
+            logger.info(f"Usando explicação em cache para: {title}")
+            return cached_explanation
 
         # Se não temos API key ou conteúdo, retornar explicação genérica
-        if not self.api_key or not content:
+        if not self._has_key or not content:
             explanation = self._generate_generic_explanation(title)
-            self.cache[cache_key] = explanation
-            self._save_cache()
+            self._set_cached(cache_key, explanation)
             return explanation
 
         # Gerar explicação usando a API da OpenAI
@@ -117,56 +392,335 @@ Características do meu estilo de fala:
             explanation = self._call_openai_api(title, content)
 
             # Salvar no cache
-            self.cache[cache_key] = explanation
-            self._save_cache()
+            self._set_cached(cache_key, explanation)
 
             return explanation
         except Exception as e:
-            print(f"Erro ao gerar explicação com IA: {e}")
+            logger.error(f"Erro ao gerar explicação com IA: {e}")
             explanation = self._generate_generic_explanation(title)
             return explanation
 
-    def _call_openai_api(self, title, content):
+    def get_explanations_batch(self, news_items, concurrency=10):
         """
-        Chama a API da OpenAI para gerar uma explicação.
+        Gera explicações para várias notícias em paralelo.
+
+        As notícias já presentes no cache (ou sem conteúdo) são resolvidas
+        localmente; as demais são enviadas concorrentemente para a API da
+        OpenAI, limitadas por um semáforo.
+
+        Args:
+            news_items (list): Lista de itens de notícia.
+            concurrency (int): Número máximo de requisições simultâneas.
+
+        Returns:
+            list: Explicações na mesma ordem dos itens recebidos.
+        """
+        return asyncio.run(self._get_explanations_batch_async(news_items, concurrency))
+
+    async def _get_explanations_batch_async(self, news_items, concurrency):
+        """
+        Implementação assíncrona de `get_explanations_batch`.
+
+        Args:
+            news_items (list): Lista de itens de notícia.
+            concurrency (int): Número máximo de requisições simultâneas.
+
+        Returns:
+            list: Explicações na mesma ordem dos itens recebidos.
+        """
+        explanations, pending = self._resolve_locally(news_items)
+
+        if pending:
+            semaphore = asyncio.Semaphore(concurrency)
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            generated = []
+
+            async def explain(client, index, title, content):
+                async with semaphore:
+                    try:
+                        explanations[index] = await self._call_openai_api_async(client, title, content)
+                        generated.append((title, explanations[index]))
+                    except Exception as e:
+                        logger.error(f"Erro ao gerar explicação com IA: {e}")
+                        explanations[index] = self._generate_generic_explanation(title)
+
+            async with httpx.AsyncClient(headers=self._headers, limits=limits, timeout=30) as client:
+                await asyncio.gather(*(explain(client, *item) for item in pending))
+
+            # Gravar no cache de uma vez, fora do caminho das requisições (o SQLite é síncrono)
+            self._set_cached_many(generated)
+
+        return explanations
+
+    def get_explanations_multiplexed(self, news_items, batch_size=5, concurrency=10):
+        """
+        Gera explicações agrupando várias notícias em cada requisição.
+
+        Cada requisição pede ao modelo um array JSON com uma explicação por
+        notícia, reduzindo o número de requisições por minuto; os grupos são
+        enviados concorrentemente, limitados por um semáforo. Itens que o
+        modelo não devolver (ou grupos com resposta inválida) são gerados
+        individualmente pelo mesmo caminho assíncrono.
+
+        Args:
+            news_items (list): Lista de itens de notícia.
+            batch_size (int): Número de notícias por requisição.
+            concurrency (int): Número máximo de requisições simultâneas.
+
+        Returns:
+            list: Explicações na mesma ordem dos itens recebidos.
+        """
+        return asyncio.run(self._get_explanations_multiplexed_async(news_items, batch_size, concurrency))
+
+    async def _get_explanations_multiplexed_async(self, news_items, batch_size, concurrency):
+        """
+        Implementação assíncrona de `get_explanations_multiplexed`.
+
+        Args:
+            news_items (list): Lista de itens de notícia.
+            batch_size (int): Número de notícias por requisição.
+            concurrency (int): Número máximo de requisições simultâneas.
+
+        Returns:
+            list: Explicações na mesma ordem dos itens recebidos.
+        """
+        explanations, pending = self._resolve_locally(news_items)
+
+        if pending:
+            semaphore = asyncio.Semaphore(concurrency)
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            generated = []
+
+            async def explain_one(client, index, title, content):
+                async with semaphore:
+                    try:
+                        explanations[index] = await self._call_openai_api_async(client, title, content)
+                        generated.append((title, explanations[index]))
+                    except Exception as e:
+                        logger.error(f"Erro ao gerar explicação com IA: {e}")
+                        explanations[index] = self._generate_generic_explanation(title)
+
+            async def explain_group(client, group):
+                async with semaphore:
+                    try:
+                        group_explanations = await self._call_openai_api_multiplexed_async(client, group)
+                    except Exception as e:
+                        logger.warning(f"Erro ao gerar explicações em lote, gerando individualmente: {e}")
+                        group_explanations = {}
+
+                missing = []
+                for index, title, content in group:
+                    explanation = group_explanations.get(index)
+                    if explanation:
+                        explanations[index] = explanation
+                        generated.append((title, explanation))
+                    else:
+                        missing.append((index, title, content))
+
+                await asyncio.gather(*(explain_one(client, *item) for item in missing))
+
+            async with httpx.AsyncClient(headers=self._headers, limits=limits, timeout=60) as client:
+                await asyncio.gather(*(
+                    explain_group(client, pending[start:start + batch_size])
+                    for start in range(0, len(pending), batch_size)
+                ))
+
+            # Gravar no cache de uma vez, fora do caminho das requisições (o SQLite é síncrono)
+            self._set_cached_many(generated)
+
+        return explanations
+
+    def _resolve_locally(self, news_items):
+        """
+        Resolve as notícias que não precisam da API (em cache ou sem conteúdo).
+
+        Args:
+            news_items (list): Lista de itens de notícia.
+
+        Returns:
+            tuple: Lista de explicações (None onde falta gerar) e lista de
+                tuplas (índice, título, conteúdo) a enviar para a API.
+        """
+        explanations = [None] * len(news_items)
+        pending = []
+
+        for index, news_item in enumerate(news_items):
+            title = news_item.get("title", "")
+            content = news_item.get("content", "")
+            cache_key = self._cache_key(title)
+            cached_explanation = self._get_cached(cache_key)
+
+            if cached_explanation is not None:
+                logger.info(f"Usando explicação em cache para: {title}")
+                explanations[index] = cached_explanation
+            elif not self._has_key or not content:
+                explanations[index] = self._generate_generic_explanation(title)
+                self._set_cached(cache_key, explanations[index])
+            else:
+                pending.append((index, title, content))
+
+        return explanations, pending
+
+    @staticmethod
+    def _truncate(text, max_tokens=MAX_CONTENT_TOKENS):
+        """
+        Limita o tamanho do conteúdo enviado no prompt.
+
+        Args:
+            text (str): Texto a ser truncado.
+            max_tokens (int): Número máximo de tokens.
+
+        Returns:
+            str: Texto original ou truncado com reticências.
+        """
+        encoding = _get_encoding()
+        tokens = encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens]) + "..."
+
+    def _build_request_data(self, title, content):
+        """
+        Monta o corpo da requisição para a API da OpenAI.
 
         Args:
             title (str): Título da notícia.
             content (str): Conteúdo da notícia.
 
         Returns:
-            str: Explicação gerada.
+            dict: Corpo da requisição.
         """
-        url = "https://api.openai.com/v1/chat/completions"
+        # O estilo vai uma única vez na mensagem de sistema; o usuário envia só a notícia
+        prompt = f"Título: {title}\n\nConteúdo: {self._truncate(content)}"
 
-        # Preparar o prompt
-        prompt = f"{self.style_prompt}\n\nTítulo: {title}\n\nConteúdo: {content}"
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
+        # Só a mensagem do usuário muda; o restante vem do modelo pré-montado
+        return {
+            **_REQUEST_TEMPLATE,
+            "messages": [
+                _SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt + _USER_INSTRUCTIONS}
+            ]
         }
 
-        data = {
-            "model": "gpt-4",
+    def _build_multiplexed_request_data(self, group):
+        """
+        Monta o corpo de uma requisição com várias notícias.
+
+        Args:
+            group (list): Tuplas (índice, título, conteúdo) das notícias.
+
+        Returns:
+            dict: Corpo da requisição.
+        """
+        items = [
+            {"id": index, "title": title, "content": self._truncate(content)}
+            for index, title, content in group
+        ]
+        prompt = (
+            "Gere uma explicação para CADA notícia abaixo. Responda apenas com um array JSON "
+            'no formato [{"id": <id da notícia>, "explanation": "<explicação>"}, ...].\n\n'
+            + orjson.dumps(items).decode("utf-8")
+        )
+
+        return {
+            **_REQUEST_TEMPLATE,
             "messages": [
-                {"role": "system", "content": "Você é um assistente especializado em criar conteúdo sobre criptomoedas no estilo de Renato Santanna Silva, com seu característico sotaque carioca. Enfatize o chiado nos 's' finais das palavras (que soam como 'x'). Use 'cambada' em vez de 'galera', expressões de entusiasmo, analogias simples, tom conversacional, frases curtas e diretas, perguntas retóricas, referências a memes, e repetições características como 'tropa, tropa, tropa'."},
-                {"role": "user", "content": prompt + "\n\nIMPORTANTE: Limite sua resposta a no máximo 3-4 frases curtas. Seja direto, objetivo e use meu estilo característico com gírias e expressões."}
+                _SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt + _MULTIPLEXED_INSTRUCTIONS}
             ],
-            "max_tokens": 150,
-            "temperature": 0.8
+            "max_tokens": _REQUEST_TEMPLATE["max_tokens"] * len(group)
         }
 
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+    @staticmethod
+    def _estimate_tokens(data):
+        """
+        Calcula os tokens consumidos por uma requisição (prompt + resposta máxima).
+
+        Args:
+            data (dict): Corpo da requisição.
+
+        Returns:
+            int: Número de tokens.
+        """
+        # Cada mensagem do chat tem ~4 tokens de formatação, mais 3 de abertura da resposta
+        prompt_tokens = sum(count_tokens(message["content"]) + 4 for message in data["messages"]) + 3
+        return prompt_tokens + data["max_tokens"]
+
+    @retry_on_transient_errors
+    def _call_openai_api(self, title, content):
+        """
+        Chama a API da OpenAI para gerar uma explicação.
+
+        Args:
+            title (str): Título da notícia.
+            content (str): Conteúdo da notícia.
+
+        Returns:
+            str: Explicação gerada.
+        """
+        data = self._build_request_data(title, content)
+        self.rate_limiter.acquire(self._estimate_tokens(data))
+
+        response = self.session.post(OPENAI_CHAT_URL, data=orjson.dumps(data), timeout=30)
         response.raise_for_status()
 
-        result = response.json()
-        explanation = result["choices"][0]["message"]["content"].strip()
+        result = orjson.loads(response.content)
+        return result["choices"][0]["message"]["content"].strip()
+
+    @retry_on_transient_errors
+    async def _call_openai_api_async(self, client, title, content):
+        """
+        Versão assíncrona de `_call_openai_api`, usada no processamento em lote.
+
+        Args:
+            client (httpx.AsyncClient): Cliente HTTP assíncrono compartilhado.
+            title (str): Título da notícia.
+            content (str): Conteúdo da notícia.
+
+        Returns:
+            str: Explicação gerada.
+        """
+        data = self._build_request_data(title, content)
+        await self.rate_limiter.acquire_async(self._estimate_tokens(data))
 
-        # Adicionar um pequeno atraso para evitar atingir limites de taxa
-        time.sleep(1)
+        response = await client.post(OPENAI_CHAT_URL, content=orjson.dumps(data))
+        response.raise_for_status()
 
-        return explanation
+        result = orjson.loads(response.content)
+        return result["choices"][0]["message"]["content"].strip()
+
+    @retry_on_transient_errors
+    async def _call_openai_api_multiplexed_async(self, client, group):
+        """
+        Chama a API da OpenAI uma única vez para várias notícias.
+
+        Args:
+            client (httpx.AsyncClient): Cliente HTTP assíncrono compartilhado.
+            group (list): Tuplas (índice, título, conteúdo) das notícias.
+
+        Returns:
+            dict: Explicações indexadas pelo índice da notícia.
+        """
+        data = self._build_multiplexed_request_data(group)
+        await self.rate_limiter.acquire_async(self._estimate_tokens(data))
+
+        response = await client.post(OPENAI_CHAT_URL, content=orjson.dumps(data))
+        response.raise_for_status()
+
+        result = orjson.loads(response.content)
+        reply = result["choices"][0]["message"]["content"].strip()
+
+        # O modelo às vezes envolve o JSON em um bloco de código markdown
+        if reply.startswith("```"):
+            reply = reply.strip("`").strip()
+            if reply.startswith("json"):
+                reply = reply[len("json"):]
+
+        return {
+            item["id"]: item["explanation"].strip()
+            for item in orjson.loads(reply)
+            if isinstance(item, dict) and isinstance(item.get("explanation"), str)
+        }
 
     def _generate_generic_explanation(self, title):
         """
@@ -185,6 +739,8 @@ Características do meu estilo de fala:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # Teste simples
     explainer = AIExplainer()
 
@@ -2,15 +2,118 @@
 Módulo para gerar áudio a partir de texto usando a API da ElevenLabs.
 """
 import os
+import logging
 import json
 import time
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache, partial
+import orjson
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from dotenv import dotenv_values, load_dotenv
 import elevenlabs
 
+from http_retry import retry_on_transient_errors
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Logger do módulo; sem configuração da aplicação, as mensagens são descartadas
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Extensões dos vídeos usados na extração de amostras
+_VIDEO_EXTENSIONS = frozenset({".mp4", ".avi", ".mov", ".mkv"})
+
+@lru_cache(maxsize=1)
+def _dotenv_cache():
+    """
+    Lê o arquivo .env uma única vez por processo.
+
+    Returns:
+        dict: Variáveis definidas no .env (vazio se o arquivo não existir).
+    """
+    try:
+        return dotenv_values('.env')
+    except Exception as e:
+        logger.error(f"Erro ao ler arquivo .env: {e}")
+        return {}
+
+
+def _audio_codec(media_file):
+    """
+    Identifica o codec da primeira faixa de áudio de um arquivo com o ffprobe.
+
+    Args:
+        media_file (str): Caminho do arquivo.
+
+    Returns:
+        str: Nome do codec (ex.: "mp3", "aac"), ou string vazia se não houver áudio.
+    """
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a:0",
+         "-show_entries", "stream=codec_name", "-of", "csv=p=0", media_file],
+        check=True, capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+def _extract_one(video_file, index, samples_dir, max_duration, use_ffmpeg):
+    """
+    Extrai o áudio de um único vídeo (executado em um processo separado).
+
+    Args:
+        video_file (str): Caminho do vídeo.
+        index (int): Número da amostra, usado no nome do arquivo.
+        samples_dir (str): Diretório onde a amostra será salva.
+        max_duration (int): Duração máxima da amostra em segundos.
+        use_ffmpeg (bool): Se True, usa ffmpeg diretamente; senão, moviepy.
+
+    Returns:
+        str: Caminho da amostra extraída, ou None se falhar.
+    """
+    try:
+        audio_path = os.path.join(samples_dir, f"sample_{index}.mp3")
+
+        if use_ffmpeg:
+            # Áudio já em MP3: copiar os quadros (cortes alinhados a quadros de ~26 ms); senão, codificar com o LAME
+            if _audio_codec(video_file) == "mp3":
+                audio_codec = ["-c:a", "copy"]
+            else:
+                audio_codec = ["-c:a", "libmp3lame", "-q:a", "4"]
+
+            # Extrair só a faixa de áudio, sem decodificar os quadros do vídeo
+            subprocess.run(
+                ["ffmpeg", "-y", "-ss", "0", "-t", str(max_duration), "-i", video_file,
+                 "-vn", "-map", "0:a:0", *audio_codec, audio_path],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        else:
+            import moviepy.editor as mp
+
+            # Extrair áudio do vídeo
+            video = mp.VideoFileClip(video_file)
+
+            # Limitar a duração
+            if video.duration > max_duration:
+                video = video.subclip(0, max_duration)
+
+            # Salvar o áudio
+            video.audio.write_audiofile(audio_path, codec='mp3')
+
+            # Fechar o vídeo
+            video.close()
+
+        return audio_path
+
+    except Exception as e:
+        logger.error(f"Erro ao extrair áudio do vídeo {video_file}: {e}")
+        return None
+
+
 class AudioGenerator:
     """
     Classe para gerar áudio a partir de texto usando a API da ElevenLabs.
@@ -25,19 +128,18 @@ class AudioGenerator:
 
         # Se não conseguir obter a chave do ambiente, tentar ler diretamente do arquivo .env
         if not self.api_key:
-            try:
-                with open('.env', 'r') as f:
-                    for line in f:
-                        if line.startswith('ELEVENLABS_API_KEY='):
-                            self.api_key = line.strip().split('=', 1)[1]
-                            break
-            except Exception as e:
-                print(f"Erro ao ler arquivo .env: {e}")
+            self.api_key = _dotenv_cache().get("ELEVENLABS_API_KEY")
 
-        if not self.api_key:
-            print("Aviso: API key da ElevenLabs não encontrada. A geração de áudio não funcionará.")
-        else:
-            print(f"API key da ElevenLabs encontrada: {self.api_key[:5]}...{self.api_key[-5:]}")
+        # Verificar a chave uma única vez; os demais métodos consultam apenas este indicador
+        self._has_key = bool(self.api_key)
+        if not self._has_key:
+            logger.warning("Aviso: API key da ElevenLabs não encontrada. A geração de áudio não funcionará.")
+
+        # Sessão HTTP reutilizável (pool de conexões + keep-alive)
+        self.session = requests.Session()
+        if self._has_key:
+            self.session.headers["xi-api-key"] = self.api_key
+        self.session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
 
         # Diretório para armazenar os áudios gerados
         self.audio_dir = os.path.join(os.getcwd(), "output", "audio")
@@ -72,11 +174,11 @@ class AudioGenerator:
                     # Carregar configurações avançadas se disponíveis
                     if "settings" in config:
                         self.voice_settings.update(config["settings"])
-                        print(f"Configurações avançadas carregadas: {self.voice_settings}")
+                        logger.info(f"Configurações avançadas carregadas: {self.voice_settings}")
 
-                    print(f"Configuração de voz carregada. ID: {self.voice_id}, Nome: {self.voice_name}")
+                    logger.info(f"Configuração de voz carregada. ID: {self.voice_id}, Nome: {self.voice_name}")
             except Exception as e:
-                print(f"Erro ao carregar configuração de voz: {e}")
+                logger.error(f"Erro ao carregar configuração de voz: {e}")
 
     def generate_audio(self, text, output_path=None):
         """
@@ -89,8 +191,8 @@ class AudioGenerator:
         Returns:
             str: Caminho para o arquivo de áudio gerado, ou None se falhar.
         """
-        if not self.api_key:
-            print("API key da ElevenLabs não configurada. Não é possível gerar áudio.")
+        if not self._has_key:
+            logger.error("API key da ElevenLabs não configurada. Não é possível gerar áudio.")
             return None
 
         try:
@@ -105,11 +207,7 @@ class AudioGenerator:
             # Preparar a requisição para a API
             url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_identifier}"
 
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.api_key
-            }
+            headers = {"Accept": "audio/mpeg", "Content-Type": "application/json"}
 
             data = {
                 "text": text,
@@ -118,21 +216,42 @@ class AudioGenerator:
             }
 
             # Fazer a requisição para a API
-            print(f"Gerando áudio para o texto: '{text[:50]}...'")
-            response = requests.post(url, json=data, headers=headers, timeout=60)
-            response.raise_for_status()
+            logger.info(f"Gerando áudio para o texto: '{text[:50]}...'")
+            response = self._post_text_to_speech(url, data, headers)
 
-            # Salvar o áudio
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
+            # Salvar o áudio à medida que ele chega, sem manter o MP3 inteiro em memória
+            with response, open(output_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
 
-            print(f"Áudio gerado com sucesso: {output_path}")
+            logger.info(f"Áudio gerado com sucesso: {output_path}")
             return output_path
 
         except Exception as e:
-            print(f"Erro ao gerar áudio: {e}")
+            logger.error(f"Erro ao gerar áudio: {e}")
             return None
 
+    @retry_on_transient_errors
+    def _post_text_to_speech(self, url, data, headers):
+        """
+        Envia a requisição de síntese de voz, repetindo-a em falhas transitórias.
+
+        Args:
+            url (str): Endpoint de text-to-speech da ElevenLabs.
+            data (dict): Corpo da requisição.
+            headers (dict): Cabeçalhos adicionais da requisição.
+
+        Returns:
+            requests.Response: Resposta bem-sucedida da API, em modo streaming.
+        """
+        response = self.session.post(url, data=orjson.dumps(data), headers=headers, timeout=60, stream=True)
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
+
     def clone_voice(self, audio_files, voice_name="Rapidinha Voice"):
         """
         Clona uma voz a partir de arquivos de áudio.
@@ -144,8 +263,8 @@ class AudioGenerator:
         Returns:
             str: ID da voz clonada, ou None se falhar.
         """
-        if not self.api_key:
-            print("API key da ElevenLabs não configurada. Não é possível clonar voz.")
+        if not self._has_key:
+            logger.error("API key da ElevenLabs não configurada. Não é possível clonar voz.")
             return None
 
         try:
@@ -156,36 +275,34 @@ class AudioGenerator:
                     valid_files.append(audio_file)
 
             if not valid_files:
-                print("Nenhum arquivo de áudio válido encontrado.")
+                logger.error("Nenhum arquivo de áudio válido encontrado.")
                 return None
 
             # Clonar a voz usando a API da ElevenLabs
-            print(f"Clonando voz a partir de {len(valid_files)} arquivos de áudio...")
-
-            # Preparar os arquivos para upload
-            files = []
-            for audio_file in valid_files:
-                with open(audio_file, 'rb') as f:
-                    files.append(('files', (os.path.basename(audio_file), f.read(), 'audio/mpeg')))
+            logger.info(f"Clonando voz a partir de {len(valid_files)} arquivos de áudio...")
 
             # Fazer a requisição para a API
-            import requests
             url = "https://api.elevenlabs.io/v1/voices/add"
-            headers = {"xi-api-key": self.api_key}
             data = {
                 "name": voice_name,
                 "description": "Voz clonada para o quadro Rapidinha no Cripto"
             }
 
-            response = requests.post(url, headers=headers, data=data, files=files)
+            # Enviar os arquivos a partir dos handles abertos, sem copiá-los antes para a memória
+            with ExitStack() as stack:
+                files = [
+                    ('files', (os.path.basename(audio_file), stack.enter_context(open(audio_file, 'rb')), 'audio/mpeg'))
+                    for audio_file in valid_files
+                ]
+                response = self.session.post(url, data=data, files=files)
             response.raise_for_status()
 
             # Processar a resposta
-            result = response.json()
+            result = orjson.loads(response.content)
             voice_id = result.get("voice_id")
 
             if voice_id:
-                print(f"Voz clonada com sucesso! ID: {voice_id}")
+                logger.info(f"Voz clonada com sucesso! ID: {voice_id}")
 
                 # Atualizar o ID da voz
                 self.voice_id = voice_id
@@ -213,11 +330,11 @@ class AudioGenerator:
 
                 return voice_id
             else:
-                print("Falha ao clonar voz. Nenhum ID de voz retornado.")
+                logger.error("Falha ao clonar voz. Nenhum ID de voz retornado.")
                 return None
 
         except Exception as e:
-            print(f"Erro ao clonar voz: {e}")
+            logger.error(f"Erro ao clonar voz: {e}")
             return None
 
     def extract_audio_samples(self, video_dir, max_samples=5, max_duration=30):
@@ -233,63 +350,52 @@ class AudioGenerator:
             list: Lista de caminhos para os arquivos de áudio extraídos.
         """
         try:
-            import moviepy.editor as mp
+            # Sem ffmpeg/ffprobe no PATH, recorrer ao moviepy (mais lento, pois também decodifica o vídeo)
+            use_ffmpeg = shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+            if not use_ffmpeg:
+                import moviepy.editor  # Apenas verifica se o moviepy está instalado
 
             # Diretório para armazenar as amostras
             samples_dir = os.path.join(os.getcwd(), "reference", "voice_samples")
             os.makedirs(samples_dir, exist_ok=True)
 
-            # Listar todos os vídeos no diretório
-            video_files = []
-            for filename in os.listdir(video_dir):
-                if filename.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                    video_files.append(os.path.join(video_dir, filename))
+            # Listar todos os vídeos no diretório (scandir reaproveita o tipo de cada entrada, sem um stat por arquivo)
+            with os.scandir(video_dir) as entries:
+                video_files = [
+                    entry.path for entry in entries
+                    if entry.is_file(follow_symlinks=False) and os.path.splitext(entry.name)[1].lower() in _VIDEO_EXTENSIONS
+                ]
 
             if not video_files:
-                print("Nenhum vídeo encontrado no diretório.")
+                logger.warning("Nenhum vídeo encontrado no diretório.")
                 return []
 
             # Limitar o número de vídeos
             video_files = video_files[:max_samples]
 
-            # Extrair amostras de áudio
-            audio_samples = []
-            for i, video_file in enumerate(video_files):
-                try:
-                    # Extrair áudio do vídeo
-                    video = mp.VideoFileClip(video_file)
-
-                    # Limitar a duração
-                    if video.duration > max_duration:
-                        video = video.subclip(0, max_duration)
-
-                    # Salvar o áudio
-                    audio_path = os.path.join(samples_dir, f"sample_{i+1}.mp3")
-                    video.audio.write_audiofile(audio_path, codec='mp3')
-
-                    # Adicionar à lista de amostras
-                    audio_samples.append(audio_path)
+            # Extrair amostras de áudio em paralelo (um processo por vídeo)
+            extract = partial(_extract_one, samples_dir=samples_dir,
+                              max_duration=max_duration, use_ffmpeg=use_ffmpeg)
+            with ProcessPoolExecutor(max_workers=min(len(video_files), os.cpu_count() or 1)) as executor:
+                results = executor.map(extract, video_files, range(1, len(video_files) + 1))
+                audio_samples = [audio_path for audio_path in results if audio_path]
 
-                    # Fechar o vídeo
-                    video.close()
-
-                except Exception as e:
-                    print(f"Erro ao extrair áudio do vídeo {video_file}: {e}")
-
-            print(f"Extraídas {len(audio_samples)} amostras de áudio para clonagem de voz.")
+            logger.info(f"Extraídas {len(audio_samples)} amostras de áudio para clonagem de voz.")
             return audio_samples
 
         except ImportError:
-            print("Erro: biblioteca moviepy não encontrada. Instale moviepy.")
+            logger.error("Erro: ffmpeg não encontrado e biblioteca moviepy não instalada. Instale ffmpeg ou moviepy.")
             return []
         except Exception as e:
-            print(f"Erro ao extrair amostras de áudio: {e}")
+            logger.error(f"Erro ao extrair amostras de áudio: {e}")
             return []
 
 
 if __name__ == "__main__":
     import argparse
 
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     parser = argparse.ArgumentParser(description="Gerador de áudio para o Clone Rapidinha no Cripto")
     parser.add_argument("--text", help="Texto a ser convertido em áudio")
     parser.add_argument("--clone", action="store_true", help="Clonar voz a partir de amostras de áudio")
@@ -305,10 +411,9 @@ if __name__ == "__main__":
         try:
             print("Vozes disponíveis:")
             url = "https://api.elevenlabs.io/v1/voices"
-            headers = {"xi-api-key": generator.api_key}
-            response = requests.get(url, headers=headers)
+            response = generator.session.get(url)
             response.raise_for_status()
-            voices_data = response.json()
+            voices_data = orjson.loads(response.content)
 
             for voice in voices_data.get("voices", []):
                 print(f"- {voice.get('name')} (ID: {voice.get('voice_id')})")
@@ -335,7 +440,6 @@ if __name__ == "__main__":
         if audio_path and args.play:
             try:
                 # Reproduzir o áudio usando o player padrão do sistema
-                import subprocess
                 import platform
 
                 system = platform.system()
@@ -1,17 +1,148 @@
-from fastapi import APIRouter, HTTPException, Query, Body, UploadFile, File
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Body, UploadFile, File, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing import List, Optional, Dict, Any, Tuple, Callable
 from datetime import datetime
+import hashlib
+import os
+import sys
+import tempfile
+from types import MappingProxyType
+import aiofiles
+from ..core.cache import (
+    get_cached_international_law,
+    cache_international_law,
+    get_cached_document_analysis,
+    cache_document_analysis,
+    coalesce,
+    normalize_query,
+    INTERNATIONAL_LAW_CACHE_TTL
+)
 from ..services.international_law_service import (
     search_international_law, 
     get_singapore_legislation, 
     get_customs_regulations,
     analyze_customs_document
 )
+from ..services.document_parser import parse_document, DocumentParseError
+from ..core.process_pool import run_in_process
 
 router = APIRouter()
 
+# Tamanho dos blocos lidos do upload (o arquivo nunca é carregado inteiro na memória)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+# Formatos de arquivo aceitos no upload
+_SUPPORTED_EXTENSIONS = frozenset({'pdf', 'docx', 'xml', 'json'})
+_SUPPORTED_EXTENSIONS_TEXT = ', '.join(sorted(_SUPPORTED_EXTENSIONS))
+
+def _frozen_fields(fields: Dict[str, Any]) -> MappingProxyType:
+    """
+    Cria uma visão somente leitura dos campos fixos de um documento simulado.
+    
+    Os nomes dos campos são internados, assim como no serviço de análise, para que
+    as buscas no conteúdo extraído comparem as chaves por identidade.
+    
+    Args:
+        fields: Campos fixos do documento
+        
+    Returns:
+        Mapeamento somente leitura, compartilhado entre requisições
+    """
+    return MappingProxyType({sys.intern(name): value for name, value in fields.items()})
+
+# Campos fixos do conteúdo simulado de cada tipo de documento
+_INVOICE_STATIC = _frozen_fields({
+    "valor total": "5000.00",
+    "destinatário": "Empresa XYZ Ltda.",
+    "remetente": "Acme Global Trading",
+    # Intencionalmente deixando alguns campos ausentes para demonstrar validação
+    "códigos HS": ("8471.30", "8517.12"),
+    "país de origem": "china"
+})
+_BL_STATIC = _frozen_fields({
+    "embarcador": "Acme Global Trading",
+    "consignatário": "Empresa XYZ Ltda.",
+    "descrição das mercadorias": "Equipamentos eletrônicos",
+    "quantidade": "10 caixas",
+    # Campos ausentes intencionalmente
+})
+_PACKING_LIST_STATIC = _frozen_fields({
+    "exportador": "Acme Global Trading",
+    "importador": "Empresa XYZ Ltda.",
+    "detalhes de embalagem": "10 caixas, 200kg total"
+    # Campos ausentes intencionalmente
+})
+_CERTIFICATE_OF_ORIGIN_STATIC = _frozen_fields({
+    "exportador": "Acme Global Trading",
+    "importador": "Empresa XYZ Ltda.",
+    "descrição das mercadorias": "Equipamentos eletrônicos",
+    "regras de origem": "Totalmente obtido"
+    # Campos ausentes intencionalmente
+})
+
+# Campos que variam a cada requisição (número do documento e datas)
+(
+    _INVOICE_NUMBER, _INVOICE_DATE, _BL_NUMBER, _PACKING_LIST_REFERENCE, _PACKING_LIST_DATE, _CERTIFICATE_NUMBER
+) = map(sys.intern, (
+    "número da fatura", "data de emissão", "número do conhecimento", "referência", "data", "número do certificado"
+))
+
+# Conteúdo simulado extraído de cada tipo de documento, a partir da data (AAAAMMDD) e do timestamp ISO
+_DOCUMENT_TEMPLATES: Dict[str, Callable[[str, str], Dict[str, Any]]] = {
+    "invoice": lambda ymd, iso: {**_INVOICE_STATIC, _INVOICE_NUMBER: f"INV-{ymd}-001", _INVOICE_DATE: iso},
+    "bl": lambda ymd, iso: {**_BL_STATIC, _BL_NUMBER: f"BL-{ymd}-001"},
+    "packing_list": lambda ymd, iso: {
+        **_PACKING_LIST_STATIC, _PACKING_LIST_REFERENCE: f"PL-{ymd}-001", _PACKING_LIST_DATE: iso
+    },
+    "certificate_of_origin": lambda ymd, iso: {**_CERTIFICATE_OF_ORIGIN_STATIC, _CERTIFICATE_NUMBER: f"CO-{ymd}-001"},
+}
+
+async def _cached_results(
+    request: Request,
+    cache_key: Tuple[Any, ...],
+    adapter: TypeAdapter,
+    service: Callable[..., List[Dict[str, Any]]],
+    *args: Any
+) -> Response:
+    """
+    Executa uma consulta com cache em memória e cabeçalhos de cache HTTP.
+    
+    Args:
+        request: Requisição atual (para ler If-None-Match)
+        cache_key: Chave da consulta no cache
+        adapter: TypeAdapter do modelo de resposta, usado para validar e serializar os resultados
+        service: Função de serviço a ser chamada em caso de cache miss
+        *args: Argumentos da função de serviço
+        
+    Returns:
+        Resposta JSON com os resultados, ou uma resposta 304 se o cliente já tiver a versão atual
+    """
+    async def load() -> Tuple[bytes, str]:
+        results = await run_in_threadpool(service, *args)
+        # Validar e serializar em uma única passada, só no cache miss (o Response direto dispensa o encoder do FastAPI)
+        body = adapter.dump_json(adapter.validate_python(results))
+        etag = 'W/"' + hashlib.md5(body).hexdigest() + '"'
+        cache_international_law(cache_key, body, etag)
+        return body, etag
+    
+    cached = get_cached_international_law(cache_key)
+    if cached is None:
+        # Requisições idênticas simultâneas compartilham uma única chamada ao serviço
+        cached = await coalesce(("international_law",) + cache_key, load)
+    body, etag = cached
+    
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={INTERNATIONAL_LAW_CACHE_TTL}"}
+    
+    # O cliente já tem a versão atual: responder sem enviar o corpo
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
 class InternationalLawResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     id: str
     title: str
     content: str
@@ -24,6 +155,8 @@ class InternationalLawResponse(BaseModel):
     url: Optional[str] = None
 
 class CustomsRegulationResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     id: str
     country: str
     regulation_type: str
@@ -39,6 +172,10 @@ class CustomsRegulationResponse(BaseModel):
     expiration_date: Optional[datetime] = None
     url: Optional[str] = None
 
+# Adaptadores construídos uma única vez para validar e serializar as listas de resultados
+_INTERNATIONAL_LAW_LIST = TypeAdapter(List[InternationalLawResponse])
+_CUSTOMS_REGULATION_LIST = TypeAdapter(List[CustomsRegulationResponse])
+
 class DocumentAnalysisRequest(BaseModel):
     document_type: str
     document_content: Dict[str, Any]
@@ -56,6 +193,7 @@ class DocumentAnalysisResponse(BaseModel):
 
 @router.get("/search", response_model=List[InternationalLawResponse])
 async def search_international_laws(
+    request: Request,
     query: str = Query(..., min_length=3, description="Termo de busca para leis internacionais"),
     jurisdiction: Optional[str] = None,
     category: Optional[str] = None,
@@ -71,14 +209,16 @@ async def search_international_laws(
     - **limit**: Número máximo de resultados a retornar (padrão: 10)
     - **min_score**: Pontuação mínima de relevância (entre 0 e 1, padrão: 0.5)
     """
-    try:
-        results = search_international_law(query, jurisdiction, category, limit, min_score)
-        return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar leis internacionais: {str(e)}")
+    return await _cached_results(
+        request,
+        ("search", normalize_query(query), jurisdiction, category, limit, min_score),
+        _INTERNATIONAL_LAW_LIST,
+        search_international_law, query, jurisdiction, category, limit, min_score
+    )
 
 @router.get("/singapore", response_model=List[InternationalLawResponse])
 async def get_singapore_regulations(
+    request: Request,
     category: Optional[str] = None,
     limit: int = 10
 ):
@@ -88,14 +228,16 @@ async def get_singapore_regulations(
     - **category**: Filtrar por categoria (ex: "business", "tax", "investment")
     - **limit**: Número máximo de resultados a retornar (padrão: 10)
     """
-    try:
-        results = get_singapore_legislation(category, limit)
-        return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar legislação de Singapura: {str(e)}")
+    return await _cached_results(
+        request,
+        ("singapore", category, limit),
+        _INTERNATIONAL_LAW_LIST,
+        get_singapore_legislation, category, limit
+    )
 
 @router.get("/customs", response_model=List[CustomsRegulationResponse])
 async def get_customs_regulations_api(
+    request: Request,
     country: Optional[str] = None,
     product_code: Optional[str] = None,
     regulation_type: Optional[str] = None,
@@ -109,11 +251,12 @@ async def get_customs_regulations_api(
     - **regulation_type**: Filtrar por tipo de regulamentação (ex: "import", "export", "tariff")
     - **limit**: Número máximo de resultados a retornar (padrão: 10)
     """
-    try:
-        results = get_customs_regulations(country, product_code, regulation_type, limit)
-        return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar regulamentações alfandegárias: {str(e)}")
+    return await _cached_results(
+        request,
+        ("customs", country, product_code, regulation_type, limit),
+        _CUSTOMS_REGULATION_LIST,
+        get_customs_regulations, country, product_code, regulation_type, limit
+    )
 
 @router.post("/analyze-document", response_model=DocumentAnalysisResponse)
 async def analyze_document_api(
@@ -127,14 +270,17 @@ async def analyze_document_api(
     
     Retorna análise de conformidade, problemas identificados e recomendações.
     """
-    try:
-        result = analyze_customs_document(
-            document_type=document_data.document_type,
-            document_content=document_data.document_content
+    # Reenvios de um documento idêntico reaproveitam a análise anterior
+    result = get_cached_document_analysis(document_data.document_type, document_data.document_content)
+    if result is None:
+        # Análise CPU-bound: executada em outro processo para não disputar o GIL com o event loop
+        result = await run_in_process(
+            analyze_customs_document,
+            document_data.document_type,
+            document_data.document_content
         )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao analisar documento: {str(e)}")
+        cache_document_analysis(document_data.document_type, document_data.document_content, result)
+    return result
 
 @router.post("/upload-document")
 async def upload_document_analysis(
@@ -147,85 +293,57 @@ async def upload_document_analysis(
     - **document_type**: Tipo de documento sendo enviado
     - **file**: Arquivo do documento (formatos suportados: PDF, DOCX, XML)
     
-    Nota: Esta é uma versão simulada que não realiza extração real do conteúdo.
-    Em uma implementação completa, utilizaria OCR ou parsing específico para cada formato.
+    Nota: O texto do arquivo é extraído, mas os campos analisados ainda são simulados.
+    Em uma implementação completa, utilizaria OCR ou parsing específico dos campos de cada formato.
     """
-    try:
-        # Em uma implementação real, faria extração de texto do documento
-        # Aqui, simulamos dados extraídos para demonstração
-        
-        # Verificar o tipo de arquivo
-        file_extension = file.filename.split('.')[-1].lower()
-        supported_extensions = ['pdf', 'docx', 'xml', 'json']
-        
-        if file_extension not in supported_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Formato de arquivo não suportado. Formatos aceitos: {', '.join(supported_extensions)}"
-            )
-        
-        # Dados simulados conforme o tipo de documento
-        extracted_content = {}
-        
-        if document_type == "invoice":
-            extracted_content = {
-                "número da fatura": f"INV-{datetime.now().strftime('%Y%m%d')}-001",
-                "data de emissão": datetime.now().isoformat(),
-                "valor total": "5000.00",
-                "destinatário": "Empresa XYZ Ltda.",
-                "remetente": "Acme Global Trading",
-                # Intencionalmente deixando alguns campos ausentes para demonstrar validação
-                "códigos HS": ["8471.30", "8517.12"],
-                "país de origem": "china"
-            }
-        elif document_type == "bl":
-            extracted_content = {
-                "número do conhecimento": f"BL-{datetime.now().strftime('%Y%m%d')}-001",
-                "embarcador": "Acme Global Trading",
-                "consignatário": "Empresa XYZ Ltda.",
-                "descrição das mercadorias": "Equipamentos eletrônicos",
-                "quantidade": "10 caixas",
-                # Campos ausentes intencionalmente
-            }
-        elif document_type == "packing_list":
-            extracted_content = {
-                "referência": f"PL-{datetime.now().strftime('%Y%m%d')}-001",
-                "data": datetime.now().isoformat(),
-                "exportador": "Acme Global Trading",
-                "importador": "Empresa XYZ Ltda.",
-                "detalhes de embalagem": "10 caixas, 200kg total"
-                # Campos ausentes intencionalmente
-            }
-        elif document_type == "certificate_of_origin":
-            extracted_content = {
-                "número do certificado": f"CO-{datetime.now().strftime('%Y%m%d')}-001",
-                "exportador": "Acme Global Trading",
-                "importador": "Empresa XYZ Ltda.",
-                "descrição das mercadorias": "Equipamentos eletrônicos",
-                "regras de origem": "Totalmente obtido"
-                # Campos ausentes intencionalmente
-            }
-        else:
-            return {
-                "status": "error",
-                "message": f"Tipo de documento não suportado: {document_type}",
-                "supported_types": ["invoice", "bl", "packing_list", "certificate_of_origin"]
-            }
-        
-        # Realizar a análise utilizando o serviço existente
-        result = analyze_customs_document(
-            document_type=document_type,
-            document_content=extracted_content
+    # Em uma implementação real, faria extração de texto do documento
+    # Aqui, simulamos dados extraídos para demonstração
+    
+    # Verificar o tipo de arquivo
+    file_extension = os.path.splitext(file.filename)[1][1:].lower()
+    
+    if file_extension not in _SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Formato de arquivo não suportado. Formatos aceitos: {_SUPPORTED_EXTENSIONS_TEXT}"
         )
-        
-        # Adicionar informações do arquivo
-        result["file_info"] = {
-            "filename": file.filename,
-            "content_type": file.content_type,
-            "size": 0  # Em uma implementação real, teria o tamanho real
+    
+    # Dados simulados conforme o tipo de documento
+    build_content = _DOCUMENT_TEMPLATES.get(document_type)
+    if build_content is None:
+        return {
+            "status": "error",
+            "message": f"Tipo de documento não suportado: {document_type}",
+            "supported_types": list(_DOCUMENT_TEMPLATES)
         }
-        
-        return result
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao processar documento: {str(e)}") 
\ No newline at end of file
+    
+    now = datetime.now()
+    extracted_content = build_content(now.strftime('%Y%m%d'), now.isoformat())
+    
+    # Gravar o upload em disco em blocos e extrair o texto em um processo separado
+    fd, tmp_path = tempfile.mkstemp(suffix=f".{file_extension}")
+    os.close(fd)
+    try:
+        file_size = 0
+        async with aiofiles.open(tmp_path, "wb") as tmp_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                await tmp_file.write(chunk)
+                
+        extracted_content["texto extraído"] = await parse_document(tmp_path, file_extension)
+    except DocumentParseError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        os.unlink(tmp_path)
+    
+    # Realizar a análise utilizando o serviço existente
+    result = await run_in_process(analyze_customs_document, document_type, extracted_content)
+    
+    # Adicionar informações do arquivo
+    result["file_info"] = {
+        "filename": file.filename,
+        "content_type": file.content_type,
+        "size": file_size
+    }
+    
+    return result
\ No newline at end of file
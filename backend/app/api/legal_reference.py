@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Header, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from ..services.legal_reference_service import search_legal_references
+from ..core.cache import coalesce, normalize_query, LEGAL_REFERENCE_CACHE_TTL
 
 router = APIRouter()
 
@@ -21,7 +23,8 @@ async def search_references(
     query: str = Query(..., min_length=3, description="Termo de busca para referências legais"),
     source_type: Optional[str] = None,
     limit: int = 10,
-    min_score: float = 0.5
+    min_score: float = 0.5,
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Busca referências legais com base em um termo de pesquisa.
@@ -31,11 +34,18 @@ async def search_references(
     - **limit**: Número máximo de referências a serem retornadas (padrão: 10)
     - **min_score**: Pontuação mínima de relevância (entre 0 e 1, padrão: 0.5)
     """
-    try:
-        results = search_legal_references(query, source_type, limit, min_score)
-        return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar referências legais: {str(e)}")
+    # Requisições idênticas simultâneas compartilham uma única busca
+    results, etag = await coalesce(
+        ("legal_reference", normalize_query(query), source_type, limit, min_score),
+        lambda: search_legal_references(query, source_type, limit, min_score)
+    )
+    headers = {"ETag": f'"{etag}"', "Cache-Control": f"max-age={LEGAL_REFERENCE_CACHE_TTL}"}
+    
+    # O cliente já tem a versão atual: responder sem serializar nada
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    
+    return ORJSONResponse(results, headers=headers)
 
 @router.get("/{reference_id}")
 async def get_reference_details(reference_id: str):
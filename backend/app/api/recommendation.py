@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Response, Header
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from typing import List, Optional
 from datetime import datetime
 from ..services.recommendation_service import get_recommendations_for_user
+from ..core.cache import coalesce, RECOMMENDATION_CACHE_TTL
 
 router = APIRouter()
 
 class RecommendationResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     id: str
     title: str
     description: str
@@ -16,11 +19,15 @@ class RecommendationResponse(BaseModel):
     category: str
     url: Optional[str] = None
 
+# Adaptador construído uma única vez para validar e serializar a lista de recomendações
+_RECOMMENDATION_LIST = TypeAdapter(List[RecommendationResponse])
+
 @router.get("/{user_id}", response_model=List[RecommendationResponse])
 async def get_recommendations(
     user_id: str,
     limit: int = 10,
-    category: Optional[str] = None
+    category: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Retorna recomendações jurídicas personalizadas para um usuário específico.
@@ -29,8 +36,20 @@ async def get_recommendations(
     - **limit**: Número máximo de recomendações a serem retornadas (padrão: 10)
     - **category**: Filtrar recomendações por categoria (opcional)
     """
-    try:
-        recommendations = get_recommendations_for_user(user_id, limit, category)
-        return recommendations
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar recomendações: {str(e)}") 
\ No newline at end of file
+    # Requisições idênticas simultâneas compartilham uma única busca
+    recommendations, etag = await coalesce(
+        ("recommendation", user_id, limit, category),
+        lambda: get_recommendations_for_user(user_id, limit, category)
+    )
+    headers = {"ETag": f'"{etag}"', "Cache-Control": f"max-age={RECOMMENDATION_CACHE_TTL}"}
+    
+    # O cliente já tem a versão atual: responder sem serializar nada
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    
+    # Validar e serializar em uma única passada (o Response direto dispensa o encoder do FastAPI)
+    return Response(
+        content=_RECOMMENDATION_LIST.dump_json(_RECOMMENDATION_LIST.validate_python(recommendations)),
+        media_type="application/json",
+        headers=headers
+    )
\ No newline at end of file
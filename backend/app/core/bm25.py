@@ -0,0 +1,271 @@
+from typing import Dict, List, Optional, Set, Tuple
+from collections import Counter, defaultdict
+from functools import lru_cache
+import math
+import re
+import sys
+import threading
+import unicodedata
+
+# NumPy (opcional): pontuação vetorizada sobre arrays contíguos; sem ele, usa-se o caminho em Python puro
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Numba (opcional): compila o laço de pontuação para código nativo
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# NLTK (opcional): radicalizador RSLP para o português (requer o recurso "rslp");
+# sem ele, os termos são apenas normalizados quanto à acentuação
+try:
+    from nltk.stem import RSLPStemmer
+    _STEMMER = RSLPStemmer()
+except (ImportError, LookupError):
+    _STEMMER = None
+
+# Parâmetros do BM25 (saturação da frequência do termo e normalização pelo tamanho do documento)
+BM25_K1 = 0.82
+BM25_B = 0.68
+
+# Termos: sequências de caracteres alfanuméricos (a pontuação adjacente é descartada)
+_TOKEN_RE = re.compile(r"\w+")
+
+def _bm25_score(query_term_ids, term_ptr, term_doc_ids, term_tfs, idf, doc_len, avgdl, k1, b, scores_out):
+    # Percorre as listas de postings (layout CSR) dos termos da consulta, acumulando em scores_out
+    for term_id in query_term_ids:
+        weight = idf[term_id]
+        for i in range(term_ptr[term_id], term_ptr[term_id + 1]):
+            doc_id = term_doc_ids[i]
+            tf = term_tfs[i]
+            scores_out[doc_id] += weight * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len[doc_id] / avgdl))
+
+if njit is not None:
+    _bm25_score = njit(cache=True, fastmath=True)(_bm25_score)
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide um texto em termos em minúsculas, internados para que as consultas aos
+    dicionários do índice comparem por identidade.
+    
+    Args:
+        text: Texto a ser dividido
+        
+    Returns:
+        Lista de termos
+    """
+    return [sys.intern(term) for term in _TOKEN_RE.findall(text.lower())]
+
+@lru_cache(maxsize=65536)
+def _stem(term: str) -> str:
+    """
+    Reduz um termo à sua forma canônica: radical (quando o NLTK está disponível) sem acentos.
+    
+    Args:
+        term: Termo em minúsculas
+        
+    Returns:
+        Forma canônica do termo, internada
+    """
+    if _STEMMER is not None:
+        term = _STEMMER.stem(term)
+    folded = "".join(char for char in unicodedata.normalize("NFKD", term) if not unicodedata.combining(char))
+    return sys.intern(folded)
+
+def analyze(text: str) -> List[str]:
+    """
+    Divide um texto em termos canônicos, compartilhados pelo índice e pelas consultas,
+    de forma que variantes morfológicas e de acentuação ("importação"/"importacao") coincidam.
+    
+    Args:
+        text: Texto a ser analisado
+        
+    Returns:
+        Lista de termos canônicos
+    """
+    return [_stem(term) for term in tokenize(text)]
+
+class BM25Index:
+    """
+    Índice invertido com pontuação BM25 sobre uma coleção fixa de documentos.
+    
+    Os termos de cada documento são extraídos e normalizados uma única vez, na construção do índice;
+    a busca percorre apenas as listas de postings dos termos da consulta.
+    """
+    
+    def __init__(self, texts: List[str], k1: float = BM25_K1, b: float = BM25_B):
+        """
+        Constrói o índice.
+        
+        Args:
+            texts: Texto de cada documento (o ID do documento é sua posição na lista)
+            k1: Parâmetro de saturação da frequência do termo
+            b: Parâmetro de normalização pelo tamanho do documento
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_len: List[int] = []
+        
+        for doc_id, text in enumerate(texts):
+            term_counts = Counter(analyze(text))
+            self.doc_len.append(sum(term_counts.values()))
+            for term, tf in term_counts.items():
+                self.postings[term].append((doc_id, tf))
+                
+        self.n_docs = len(texts)
+        self.avgdl = sum(self.doc_len) / self.n_docs if self.n_docs else 0.0
+        self.idf: Dict[str, float] = {term: self._idf(len(postings)) for term, postings in self.postings.items()}
+        
+        if np is not None:
+            # Acumulador de pontuações reaproveitado entre consultas (um por thread)
+            self._score_buffers = threading.local()
+            self._build_arrays()
+            
+    def _build_arrays(self) -> None:
+        """
+        Converte as listas de postings para o layout CSR (arrays contíguos) usado pelos caminhos
+        vetorizado e compilado.
+        """
+        self.term_ids: Dict[str, int] = {term: term_id for term_id, term in enumerate(self.postings)}
+        self.term_ptr = np.zeros(len(self.postings) + 1, dtype=np.int32)
+        self.term_doc_ids = np.empty(sum(len(p) for p in self.postings.values()), dtype=np.int32)
+        self.term_tfs = np.empty_like(self.term_doc_ids)
+        self.idf_array = np.array([self.idf[term] for term in self.postings], dtype=np.float32)
+        self.doc_len_array = np.array(self.doc_len, dtype=np.int32)
+        # Denominador do BM25 sem o tf: k1 * (1 - b + b * |d| / avgdl), por documento
+        self.doc_norm = (
+            self.k1 * (1 - self.b + self.b * self.doc_len_array / self.avgdl)
+            if self.avgdl else np.zeros(self.n_docs)
+        ).astype(np.float32)
+        
+        offset = 0
+        for term_id, postings in enumerate(self.postings.values()):
+            for doc_id, tf in postings:
+                self.term_doc_ids[offset] = doc_id
+                self.term_tfs[offset] = tf
+                offset += 1
+            self.term_ptr[term_id + 1] = offset
+            
+    def _score_buffer(self):
+        """
+        Retorna o acumulador de pontuações da thread atual, zerado.
+        
+        Returns:
+            Array float32 com uma posição por documento
+        """
+        buffer = getattr(self._score_buffers, "scores", None)
+        if buffer is None:
+            buffer = self._score_buffers.scores = np.empty(self.n_docs, dtype=np.float32)
+        buffer.fill(0.0)
+        return buffer
+        
+    def _idf(self, df: int) -> float:
+        return math.log((self.n_docs - df + 0.5) / (df + 0.5) + 1)
+        
+    def search(self, query: str, candidates: Optional[Set[int]] = None) -> Dict[int, float]:
+        """
+        Pontua os documentos que contêm algum termo da consulta.
+        
+        A pontuação BM25 é dividida pela soma do IDF dos termos da consulta, de forma que
+        um documento de tamanho médio com uma ocorrência de cada termo tenha relevância 1.0.
+        
+        Args:
+            query: Termo de busca
+            candidates: IDs dos documentos elegíveis (opcional, todos se None)
+            
+        Returns:
+            Dicionário {ID do documento: relevância entre 0 e 1}
+        """
+        # Cada termo da consulta pontua uma única vez
+        query_terms = list(dict.fromkeys(analyze(query)))
+        if not query_terms:
+            return {}
+            
+        # Termos ausentes da coleção não pontuam, mas reduzem a relevância dos demais
+        max_score = sum(self.idf.get(term, self._idf(0)) for term in query_terms)
+        
+        if njit is not None:
+            return self._relevances(self._score_compiled(query_terms), max_score, candidates)
+            
+        if np is not None:
+            return self._relevances(self._score_vectorized(query_terms), max_score, candidates)
+            
+        scores: Dict[int, float] = defaultdict(float)
+        
+        for term in query_terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+                
+            for doc_id, tf in self.postings[term]:
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / self.avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+                
+        return {doc_id: min(1.0, score / max_score) for doc_id, score in scores.items()}
+        
+    def _relevances(self, scores, max_score: float, candidates: Optional[Set[int]]) -> Dict[int, float]:
+        """
+        Normaliza o acumulador de pontuações dos caminhos vetorizado e compilado.
+        
+        Args:
+            scores: Array com a pontuação BM25 de cada documento
+            max_score: Soma do IDF dos termos da consulta
+            candidates: IDs dos documentos elegíveis (opcional, todos se None)
+            
+        Returns:
+            Dicionário {ID do documento: relevância entre 0 e 1}
+        """
+        return {
+            int(doc_id): min(1.0, float(scores[doc_id]) / max_score)
+            for doc_id in np.flatnonzero(scores)
+            if candidates is None or doc_id in candidates
+        }
+        
+    def _score_compiled(self, query_terms: List[str]):
+        """
+        Pontua os documentos com o laço compilado pelo Numba.
+        
+        Args:
+            query_terms: Termos da consulta
+            
+        Returns:
+            Array com a pontuação BM25 de cada documento
+        """
+        query_term_ids = np.array(
+            [self.term_ids[term] for term in query_terms if term in self.term_ids], dtype=np.int32
+        )
+        
+        scores = self._score_buffer()
+        _bm25_score(
+            query_term_ids, self.term_ptr, self.term_doc_ids, self.term_tfs,
+            self.idf_array, self.doc_len_array, self.avgdl, self.k1, self.b, scores
+        )
+        return scores
+        
+    def _score_vectorized(self, query_terms: List[str]):
+        """
+        Pontua cada lista de postings com operações vetorizadas do NumPy.
+        
+        Args:
+            query_terms: Termos da consulta
+            
+        Returns:
+            Array com a pontuação BM25 de cada documento
+        """
+        scores = self._score_buffer()
+        for term in query_terms:
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+            doc_ids = self.term_doc_ids[start:end]
+            tfs = self.term_tfs[start:end].astype(np.float32)
+            # Cada documento aparece uma única vez na lista de postings do termo
+            scores[doc_ids] += self.idf_array[term_id] * tfs * (self.k1 + 1) / (tfs + self.doc_norm[doc_ids])
+        return scores
\ No newline at end of file
@@ -1,76 +1,281 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable, Set, Hashable
+import asyncio
+import logging
+import os
+import tempfile
+import threading
 import time
 from datetime import datetime, timedelta
+from cachetools import TTLCache
+from diskcache import Cache
+import msgpack
+import orjson
+import xxhash
+import redis.asyncio as redis
 
-# Cache simples em memória
-# Em um ambiente de produção, usaríamos Redis ou outra solução de cache distribuído
-_RECOMMENDATION_CACHE: Dict[str, Dict[str, Any]] = {}
-_LEGAL_REFERENCE_CACHE: Dict[str, Dict[str, Any]] = {}
+logger = logging.getLogger(__name__)
+
+# Cache distribuído em Redis (compartilhado entre workers), habilitado pela variável REDIS_URL.
+# Sem REDIS_URL, usamos o cache em disco abaixo (compartilhado entre os workers do mesmo host).
+REDIS_URL = os.getenv("REDIS_URL")
+_redis_client: Optional[redis.Redis] = None
 
 # Configuração de tempo de expiração (em segundos)
 RECOMMENDATION_CACHE_TTL = 3600  # 1 hora
 LEGAL_REFERENCE_CACHE_TTL = 86400  # 24 horas
+INTERNATIONAL_LAW_CACHE_TTL = 300  # 5 minutos
+DOCUMENT_ANALYSIS_CACHE_TTL = 1800  # 30 minutos
+
+# Período após o TTL em que recomendações expiradas ainda são servidas enquanto são atualizadas em segundo plano
+RECOMMENDATION_CACHE_GRACE = 300  # 5 minutos
+
+# Diretório do cache compartilhado entre workers (em memória via /dev/shm, quando disponível)
+SHARED_CACHE_DIR = os.getenv(
+    "SHARED_CACHE_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "juria")
+)
+
+# Tamanho máximo de cada cache compartilhado (em bytes)
+SHARED_CACHE_SIZE_LIMIT = 512 * 1024 * 1024  # 512 MiB
+
+# Cache compartilhado entre processos (SQLite mapeado em memória), limitado em tamanho e com expiração automática
+_RECOMMENDATION_CACHE = Cache(os.path.join(SHARED_CACHE_DIR, "rec"), size_limit=SHARED_CACHE_SIZE_LIMIT)
+_LEGAL_REFERENCE_CACHE = Cache(os.path.join(SHARED_CACHE_DIR, "lr"), size_limit=SHARED_CACHE_SIZE_LIMIT)
+
+# TTLCache não é thread-safe (rotas síncronas rodam no threadpool)
+_CACHE_LOCK = threading.RLock()
+
+# Usuários com atualização de recomendações em andamento e as tarefas correspondentes
+_REFRESHING_USERS: Set[str] = set()
+_REFRESH_TASKS: Set[asyncio.Task] = set()
 
-def get_cached_recommendations(user_id: str) -> Optional[List[dict]]:
+# Consultas em andamento, compartilhadas entre requisições idênticas simultâneas
+_INFLIGHT: Dict[Hashable, asyncio.Future] = {}
+
+# Cache das consultas de direito internacional, limitado em tamanho e com expiração automática
+_INTERNATIONAL_LAW_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=INTERNATIONAL_LAW_CACHE_TTL)
+
+# Cache das análises de documentos, endereçado pelo conteúdo (reenvios idênticos não refazem a análise)
+_DOCUMENT_ANALYSIS_CACHE: TTLCache = TTLCache(maxsize=5_000, ttl=DOCUMENT_ANALYSIS_CACHE_TTL)
+
+# Código de extensão msgpack para datetimes (não suportados nativamente)
+_DATETIME_EXT_CODE = 1
+
+def _get_redis() -> Optional[redis.Redis]:
     """
-    Recupera recomendações em cache para um usuário.
+    Retorna o cliente Redis, criando-o na primeira chamada.
+    
+    Returns:
+        Cliente Redis ou None se REDIS_URL não estiver configurada
+    """
+    global _redis_client
+    if _redis_client is None and REDIS_URL:
+        _redis_client = redis.Redis.from_url(REDIS_URL)
+    return _redis_client
+
+async def close_cache() -> None:
+    """
+    Encerra a conexão com o Redis, se houver, e os caches compartilhados.
+    """
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
+    _RECOMMENDATION_CACHE.close()
+    _LEGAL_REFERENCE_CACHE.close()
+
+def _encode_ext(obj: Any) -> Any:
+    """
+    Serializa tipos não suportados pelo msgpack.
+    
+    Args:
+        obj: Objeto a ser serializado
+        
+    Returns:
+        ExtType com o datetime em formato ISO
+    """
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_DATETIME_EXT_CODE, obj.isoformat().encode())
+    raise TypeError(f"Tipo não serializável no cache: {type(obj)!r}")
+
+def _decode_ext(code: int, data: bytes) -> Any:
+    """
+    Desserializa os tipos gravados por `_encode_ext`.
+    
+    Args:
+        code: Código da extensão
+        data: Bytes da extensão
+        
+    Returns:
+        Objeto original
+    """
+    if code == _DATETIME_EXT_CODE:
+        return datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+def _pack(data: Any) -> bytes:
+    return msgpack.packb(data, default=_encode_ext, use_bin_type=True)
+
+def _unpack(raw: bytes) -> Any:
+    return msgpack.unpackb(raw, ext_hook=_decode_ext, raw=False)
+
+def normalize_query(query: str) -> str:
+    """
+    Normaliza um termo de busca para que consultas equivalentes compartilhem a mesma entrada de cache.
+    
+    Args:
+        query: Termo de busca
+        
+    Returns:
+        Termo sem espaços nas extremidades e sem distinção de maiúsculas/minúsculas
+    """
+    return query.strip().casefold()
+
+def _key(*parts: Any) -> bytes:
+    # Digest xxh3 de 128 bits: chaves de tamanho fixo, independente do tamanho da consulta
+    return xxhash.xxh3_128_digest(b"\x00".join(b"" if p is None else str(p).encode() for p in parts))
+
+def _etag(data: List[dict]) -> str:
+    # Hash do conteúdo, calculado uma única vez ao armazenar no cache
+    return xxhash.xxh3_64_hexdigest(orjson.dumps(data))
+
+def _legal_reference_key(query: str, source_type: Optional[str] = None) -> bytes:
+    # Criar uma chave de cache que inclui a consulta e tipo de fonte (se especificado)
+    return _key(normalize_query(query), source_type)
+
+async def _refresh_recommendations(user_id: str, loader: Callable[[], Awaitable[List[dict]]]) -> None:
+    """
+    Recalcula as recomendações de um usuário e atualiza o cache.
     
     Args:
         user_id: ID do usuário
+        loader: Função que gera as recomendações atualizadas
+    """
+    try:
+        await cache_recommendations(user_id, await loader())
+    except Exception:
+        logger.exception(f"Erro ao atualizar recomendações em cache do usuário {user_id}")
+    finally:
+        _REFRESHING_USERS.discard(user_id)
+
+def _index_by_category(recommendations: List[dict]) -> Dict[str, List[int]]:
+    # Posições das recomendações de cada categoria, da mais para a menos relevante (empates: ordem original)
+    by_category: Dict[str, List[int]] = {}
+    for index in sorted(range(len(recommendations)), key=lambda i: -recommendations[i]["relevance_score"]):
+        by_category.setdefault(recommendations[index]["category"], []).append(index)
+    return by_category
+
+async def get_cached_recommendations(
+    user_id: str,
+    refresh: Optional[Callable[[], Awaitable[List[dict]]]] = None,
+    force: bool = False
+) -> Optional[Tuple[List[dict], str, Dict[str, List[int]]]]:
+    """
+    Recupera recomendações em cache para um usuário.
     
+    Entradas com TTL vencido continuam sendo servidas durante RECOMMENDATION_CACHE_GRACE
+    (stale-while-revalidate): se `refresh` for informado, uma única atualização é agendada
+    em segundo plano e os dados antigos são retornados imediatamente.
+    
+    Args:
+        user_id: ID do usuário
+        refresh: Função que gera recomendações atualizadas (opcional)
+        force: Ignora o cache, como se não houvesse entrada
+        
     Returns:
-        Lista de recomendações ou None se não estiver em cache ou expirado
+        Tupla (recomendações, ETag, posições por categoria) ou None se não estiver em cache ou expirado
     """
-    cache_entry = _RECOMMENDATION_CACHE.get(user_id)
-    if not cache_entry:
+    if force:
         return None
         
-    # Verificar se o cache expirou
-    if time.time() - cache_entry["timestamp"] > RECOMMENDATION_CACHE_TTL:
-        del _RECOMMENDATION_CACHE[user_id]
+    client = _get_redis()
+    if client is not None:
+        # A remoção após TTL + período de tolerância é feita pelo próprio Redis (SETEX)
+        raw = await client.get(f"rec:{user_id}")
+        cache_entry = _unpack(raw) if raw is not None else None
+    else:
+        cache_entry = _RECOMMENDATION_CACHE.get(user_id)
+            
+    if not cache_entry:
         return None
         
-    return cache_entry["data"]
+    # Entrada expirada: servir os dados antigos e atualizar em segundo plano
+    if time.time() - cache_entry["timestamp"] > cache_entry.get("ttl", RECOMMENDATION_CACHE_TTL):
+        if refresh is None:
+            return None
+        if user_id not in _REFRESHING_USERS:
+            _REFRESHING_USERS.add(user_id)
+            task = asyncio.create_task(_refresh_recommendations(user_id, refresh))
+            _REFRESH_TASKS.add(task)
+            task.add_done_callback(_REFRESH_TASKS.discard)
+            
+    data = cache_entry["data"]
+    by_category = cache_entry.get("by_category")
+    if by_category is None:
+        # Entrada gravada antes da indexação por categoria
+        by_category = _index_by_category(data)
+    return data, cache_entry["etag"], by_category
 
-def cache_recommendations(user_id: str, recommendations: List[dict]) -> None:
+async def cache_recommendations(
+    user_id: str,
+    recommendations: List[dict],
+    expire_after: int = RECOMMENDATION_CACHE_TTL
+) -> Tuple[str, Dict[str, List[int]]]:
     """
-    Armazena recomendações em cache para um usuário.
+    Armazena recomendações em cache para um usuário, indexadas por categoria.
     
     Args:
         user_id: ID do usuário
         recommendations: Lista de recomendações
+        expire_after: Segundos até a entrada ser considerada expirada
+        
+    Returns:
+        Tupla (ETag das recomendações armazenadas, posições por categoria)
     """
-    _RECOMMENDATION_CACHE[user_id] = {
+    cache_entry = {
         "timestamp": time.time(),
-        "data": recommendations
+        "ttl": expire_after,
+        "data": recommendations,
+        "etag": _etag(recommendations),
+        "by_category": _index_by_category(recommendations)
     }
+    
+    client = _get_redis()
+    if client is not None:
+        await client.setex(
+            f"rec:{user_id}",
+            expire_after + RECOMMENDATION_CACHE_GRACE,
+            _pack(cache_entry)
+        )
+    else:
+        _RECOMMENDATION_CACHE.set(user_id, cache_entry, expire=expire_after + RECOMMENDATION_CACHE_GRACE)
+    return cache_entry["etag"], cache_entry["by_category"]
 
-def get_cached_legal_references(query: str, source_type: Optional[str] = None) -> Optional[List[dict]]:
+async def get_cached_legal_references(query: str, source_type: Optional[str] = None) -> Optional[Tuple[List[dict], str]]:
     """
     Recupera referências legais em cache para uma consulta.
     
     Args:
         query: Termo de busca
         source_type: Tipo de fonte (opcional)
-    
+        
     Returns:
-        Lista de referências legais ou None se não estiver em cache ou expirado
+        Tupla (referências legais, ETag) ou None se não estiver em cache ou expirado
     """
-    # Criar uma chave de cache que inclui a consulta e tipo de fonte (se especificado)
-    cache_key = f"{query}:{source_type}" if source_type else query
+    cache_key = _legal_reference_key(query, source_type)
     
-    cache_entry = _LEGAL_REFERENCE_CACHE.get(cache_key)
+    client = _get_redis()
+    if client is not None:
+        raw = await client.get(b"lr:" + cache_key)
+        cache_entry = _unpack(raw) if raw is not None else None
+    else:
+        cache_entry = _LEGAL_REFERENCE_CACHE.get(cache_key)
+            
     if not cache_entry:
         return None
-        
-    # Verificar se o cache expirou
-    if time.time() - cache_entry["timestamp"] > LEGAL_REFERENCE_CACHE_TTL:
-        del _LEGAL_REFERENCE_CACHE[cache_key]
-        return None
-        
-    return cache_entry["data"]
+    return cache_entry["data"], cache_entry["etag"]
 
-def cache_legal_references(query: str, results: List[dict], source_type: Optional[str] = None) -> None:
+async def cache_legal_references(query: str, results: List[dict], source_type: Optional[str] = None) -> str:
     """
     Armazena referências legais em cache para uma consulta.
     
@@ -78,28 +283,140 @@ def cache_legal_references(query: str, results: List[dict], source_type: Optiona
         query: Termo de busca
         results: Lista de referências legais
         source_type: Tipo de fonte (opcional)
+        
+    Returns:
+        ETag das referências armazenadas
     """
-    # Criar uma chave de cache que inclui a consulta e tipo de fonte (se especificado)
-    cache_key = f"{query}:{source_type}" if source_type else query
-    
-    _LEGAL_REFERENCE_CACHE[cache_key] = {
-        "timestamp": time.time(),
-        "data": results
+    cache_key = _legal_reference_key(query, source_type)
+    cache_entry = {
+        "data": results,
+        "etag": _etag(results)
     }
+    
+    client = _get_redis()
+    if client is not None:
+        await client.setex(b"lr:" + cache_key, LEGAL_REFERENCE_CACHE_TTL, _pack(cache_entry))
+        return cache_entry["etag"]
+        
+    _LEGAL_REFERENCE_CACHE.set(cache_key, cache_entry, expire=LEGAL_REFERENCE_CACHE_TTL)
+    return cache_entry["etag"]
+
+def get_cached_international_law(cache_key: Tuple[Any, ...]) -> Optional[Tuple[bytes, str]]:
+    """
+    Recupera a resposta em cache para uma consulta de direito internacional.
+    
+    Args:
+        cache_key: Tupla com o nome do endpoint e os parâmetros da consulta
+        
+    Returns:
+        Tupla (corpo JSON serializado, ETag) ou None se não estiver em cache ou expirado
+    """
+    with _CACHE_LOCK:
+        return _INTERNATIONAL_LAW_CACHE.get(_key(*cache_key))
 
-def clear_user_cache(user_id: str) -> None:
+def cache_international_law(cache_key: Tuple[Any, ...], body: bytes, etag: str) -> None:
+    """
+    Armazena a resposta de uma consulta de direito internacional em cache.
+    
+    O corpo é guardado já serializado, junto com o ETag: acertos no cache não
+    validam, serializam nem calculam o hash dos resultados novamente.
+    
+    Args:
+        cache_key: Tupla com o nome do endpoint e os parâmetros da consulta
+        body: Resultados serializados em JSON
+        etag: ETag do corpo
+    """
+    with _CACHE_LOCK:
+        _INTERNATIONAL_LAW_CACHE[_key(*cache_key)] = (body, etag)
+
+def _document_analysis_key(document_type: str, document_content: Dict[str, Any]) -> bytes:
+    # Hash do conteúdo com chaves ordenadas: documentos iguais geram a mesma chave independente da ordem dos campos
+    return xxhash.xxh3_128_digest(
+        orjson.dumps({"t": document_type, "c": document_content}, option=orjson.OPT_SORT_KEYS)
+    )
+
+def get_cached_document_analysis(document_type: str, document_content: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Recupera a análise em cache de um documento.
+    
+    Args:
+        document_type: Tipo de documento
+        document_content: Conteúdo extraído do documento
+        
+    Returns:
+        Resultado da análise ou None se não estiver em cache ou expirado
+    """
+    cache_key = _document_analysis_key(document_type, document_content)
+    with _CACHE_LOCK:
+        return _DOCUMENT_ANALYSIS_CACHE.get(cache_key)
+
+def cache_document_analysis(document_type: str, document_content: Dict[str, Any], result: Dict[str, Any]) -> None:
+    """
+    Armazena a análise de um documento em cache.
+    
+    Args:
+        document_type: Tipo de documento
+        document_content: Conteúdo extraído do documento
+        result: Resultado da análise
+    """
+    cache_key = _document_analysis_key(document_type, document_content)
+    with _CACHE_LOCK:
+        _DOCUMENT_ANALYSIS_CACHE[cache_key] = result
+
+async def clear_user_cache(user_id: str) -> None:
     """
     Limpa o cache para um usuário específico.
     
     Args:
         user_id: ID do usuário
     """
-    if user_id in _RECOMMENDATION_CACHE:
-        del _RECOMMENDATION_CACHE[user_id]
+    client = _get_redis()
+    if client is not None:
+        await client.delete(f"rec:{user_id}")
+        
+    _RECOMMENDATION_CACHE.delete(user_id)
 
-def clear_all_caches() -> None:
+async def clear_all_caches() -> None:
     """
     Limpa todos os caches.
     """
+    client = _get_redis()
+    if client is not None:
+        for pattern in ("rec:*", "lr:*"):
+            async for key in client.scan_iter(match=pattern):
+                await client.delete(key)
+                
     _RECOMMENDATION_CACHE.clear()
-    _LEGAL_REFERENCE_CACHE.clear() 
\ No newline at end of file
+    _LEGAL_REFERENCE_CACHE.clear()
+    with _CACHE_LOCK:
+        _INTERNATIONAL_LAW_CACHE.clear()
+        _DOCUMENT_ANALYSIS_CACHE.clear()
+
+async def coalesce(key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Agrupa chamadas simultâneas idênticas: apenas a primeira executa `loader`,
+    as demais aguardam o mesmo resultado.
+    
+    A consulta roda em uma tarefa própria, protegida por `asyncio.shield`: o cancelamento
+    de uma requisição (ex.: cliente desconectado) não interrompe as que aguardam o mesmo resultado.
+    
+    Args:
+        key: Chave que identifica a consulta (endpoint e parâmetros)
+        loader: Função que executa a consulta
+        
+    Returns:
+        Resultado da consulta
+    """
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(loader())
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda done: _finish_inflight(key, done))
+    return await asyncio.shield(task)
+
+def _finish_inflight(key: Hashable, task: asyncio.Future) -> None:
+    # Remover a consulta concluída e evitar o aviso "exception was never retrieved" quando ninguém mais aguarda
+    if _INFLIGHT.get(key) is task:
+        del _INFLIGHT[key]
+    if not task.cancelled():
+        task.exception()
\ No newline at end of file
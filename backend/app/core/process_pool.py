@@ -0,0 +1,45 @@
+from typing import Any, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import os
+
+# Processos de análise por worker do uvicorn (main.py já sobe um worker por CPU; o total no host é workers × este valor)
+PROCESS_POOL_SIZE = int(os.getenv("PROCESS_POOL_SIZE", "2"))
+
+# Pool de processos compartilhado para o trabalho CPU-bound (fora do GIL do event loop)
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Retorna o pool de processos, criando-o na primeira chamada.
+    
+    Returns:
+        Pool de processos
+    """
+    global _PROCESS_POOL
+    if _PROCESS_POOL is None:
+        _PROCESS_POOL = ProcessPoolExecutor(max_workers=PROCESS_POOL_SIZE)
+    return _PROCESS_POOL
+
+def shutdown_process_pool() -> None:
+    """
+    Encerra o pool de processos, se houver.
+    """
+    global _PROCESS_POOL
+    if _PROCESS_POOL is not None:
+        _PROCESS_POOL.shutdown(wait=False)
+        _PROCESS_POOL = None
+
+async def run_in_process(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Executa uma função em um processo do pool, sem bloquear o event loop.
+    
+    Args:
+        func: Função a ser executada (precisa ser importável pelo processo filho)
+        *args: Argumentos da função
+        
+    Returns:
+        Resultado da função
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
\ No newline at end of file
@@ -1,24 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import os
+import anyio.to_thread
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 from api.international_law import router as international_law_router
+from core.cache import close_cache
+from core.process_pool import shutdown_process_pool
+
+# Threads disponíveis para as chamadas síncronas aos serviços (padrão do anyio: 40)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "100"))
+
+# Máximo de conexões simultâneas antes de o servidor responder 503
+LIMIT_CONCURRENCY = int(os.getenv("LIMIT_CONCURRENCY", "1000"))
+
+# Origens autorizadas para CORS (separadas por vírgula); frozenset para verificação O(1) por requisição
+CORS_ALLOWED_ORIGINS = frozenset(
+    origin.strip() for origin in os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:3000").split(",") if origin.strip()
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida da aplicação: ajusta o threadpool ao iniciar e encerra a conexão com o cache ao desligar."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+    await close_cache()
+    shutdown_process_pool()
 
 # Criação da aplicação FastAPI
 app = FastAPI(
     title="JurIA API",
     description="API para o sistema de assistência jurídica com IA",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    # Respostas serializadas com orjson (mais rápido que o json da biblioteca padrão, com suporte nativo a datetime)
+    default_response_class=ORJSONResponse
 )
 
 # Configuração de CORS para permitir requisições do frontend
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000"],
+    allow_origins=CORS_ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Compressão das respostas acima de 1 KB (listas com o conteúdo integral das leis)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Incluir o roteador de direito internacional
 app.include_router(
     international_law_router, 
@@ -26,6 +58,11 @@ app.include_router(
     tags=["Direito Internacional"]
 )
 
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Resposta de erro padrão para exceções não tratadas nas rotas (o traceback é registrado pelo servidor)."""
+    return ORJSONResponse({"detail": "Erro interno do servidor", "code": type(exc).__name__}, status_code=500)
+
 @app.get("/")
 async def root():
     """Rota raiz da API que retorna uma mensagem de boas-vindas."""
@@ -47,4 +84,13 @@ async def health_check():
 
 # Ponto de entrada para execução direta
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True) 
\ No newline at end of file
+    # Event loop uvloop quando instalado (não existe no Windows) e parser HTTP (httptools) implementados em C, um worker por CPU
+    uvicorn.run(
+        "main:app",
+        host="127.0.0.1",
+        port=8000,
+        loop="auto",
+        http="httptools",
+        workers=os.cpu_count(),
+        limit_concurrency=LIMIT_CONCURRENCY
+    ) 
\ No newline at end of file
@@ -0,0 +1,54 @@
+import zipfile
+import xml.etree.ElementTree as ET
+from pypdf import PdfReader
+from ..core.process_pool import run_in_process
+
+class DocumentParseError(ValueError):
+    """Arquivo corrompido ou que não corresponde à extensão informada."""
+
+def extract_document_text(path: str, extension: str) -> str:
+    """
+    Extrai o texto de um documento salvo em disco.
+    
+    Args:
+        path: Caminho do arquivo
+        extension: Extensão do arquivo (pdf, docx, xml, json)
+        
+    Returns:
+        Texto extraído do documento
+        
+    Raises:
+        DocumentParseError: Se o arquivo estiver corrompido ou não puder ser lido
+    """
+    try:
+        if extension == "pdf":
+            # Extração página a página, na ordem do documento
+            reader = PdfReader(path)
+            return "\n".join(page.extract_text() or "" for page in reader.pages)
+            
+        if extension == "docx":
+            with zipfile.ZipFile(path) as docx:
+                root = ET.fromstring(docx.read("word/document.xml"))
+            return "".join(root.itertext())
+            
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except Exception as e:
+        # Erro do arquivo enviado, não do servidor (mensagem simples para atravessar o processo)
+        raise DocumentParseError(f"Não foi possível ler o arquivo {extension}: {e}") from None
+
+async def parse_document(path: str, extension: str) -> str:
+    """
+    Extrai o texto de um documento em um processo separado, sem bloquear o event loop.
+    
+    Args:
+        path: Caminho do arquivo
+        extension: Extensão do arquivo (pdf, docx, xml, json)
+        
+    Returns:
+        Texto extraído do documento
+        
+    Raises:
+        DocumentParseError: Se o arquivo estiver corrompido ou não puder ser lido
+    """
+    return await run_in_process(extract_document_text, path, extension)
\ No newline at end of file
@@ -1,7 +1,16 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+import heapq
+import sys
+import threading
+import time
 import uuid
 import random
+from ..core.bm25 import BM25Index, tokenize
 
 # Dados mockados para desenvolvimento inicial - Direito Internacional
 MOCK_INTERNATIONAL_LAWS = [
@@ -163,6 +172,49 @@ MOCK_DOCUMENT_ANALYSES = {
     }
 }
 
+# Nomes de campos internados (comparação por identidade nas buscas no conteúdo extraído) e congelados em tuplas
+for _analysis in MOCK_DOCUMENT_ANALYSES.values():
+    _analysis["template_fields"] = tuple(map(sys.intern, _analysis["template_fields"]))
+    _analysis["required_info"] = tuple(map(sys.intern, _analysis["required_info"]))
+
+# Tipos de documento suportados e resposta base para tipos desconhecidos
+_SUPPORTED_DOC_TYPES = tuple(MOCK_DOCUMENT_ANALYSES)
+_UNSUPPORTED_TEMPLATE = {"status": "error", "supported_types": _SUPPORTED_DOC_TYPES}
+
+@dataclass(frozen=True, slots=True)
+class _DocTemplate:
+    """
+    Modelo de validação de um tipo de documento alfandegário.
+    """
+    fields: Tuple[str, ...]
+    required_info: Tuple[str, ...]
+    field_set: frozenset
+    required_info_set: frozenset
+    compliance_checks: Tuple[str, ...]
+
+# Modelos de validação por tipo de documento (campos em ordem e em conjuntos, para a diferença)
+_TEMPLATES: Dict[str, _DocTemplate] = {
+    document_type: _DocTemplate(
+        fields=analysis["template_fields"],
+        required_info=analysis["required_info"],
+        field_set=frozenset(analysis["template_fields"]),
+        required_info_set=frozenset(analysis["required_info"]),
+        compliance_checks=tuple(analysis["compliance_checks"])
+    )
+    for document_type, analysis in MOCK_DOCUMENT_ANALYSES.items()
+}
+
+# Leis pesquisáveis (internacionais e de Singapura) e índice BM25 construído uma única vez sobre elas
+_SEARCHABLE_LAWS = MOCK_INTERNATIONAL_LAWS + MOCK_SINGAPORE_LAWS
+_LAW_INDEX = BM25Index([f"{law['title']} {law['content']}" for law in _SEARCHABLE_LAWS])
+
+# IDs das leis pesquisáveis por jurisdição e por categoria, para filtrar antes da pontuação
+_LAW_IDS_BY_JURISDICTION: Dict[str, Set[int]] = defaultdict(set)
+_LAW_IDS_BY_CATEGORY: Dict[str, Set[int]] = defaultdict(set)
+for _doc_id, _law in enumerate(_SEARCHABLE_LAWS):
+    _LAW_IDS_BY_JURISDICTION[_law["jurisdiction"]].add(_doc_id)
+    _LAW_IDS_BY_CATEGORY[_law["category"]].add(_doc_id)
+
 def search_international_law(
     query: str,
     jurisdiction: Optional[str] = None,
@@ -183,51 +235,100 @@ def search_international_law(
     Returns:
         Lista de leis internacionais que correspondem à pesquisa
     """
-    # Combinar as leis internacionais com as de Singapura para busca
-    all_laws = MOCK_INTERNATIONAL_LAWS + MOCK_SINGAPORE_LAWS
-    
     # Em um ambiente real, aqui faríamos uma busca vetorial ou semântica
     # nos documentos jurídicos, usando embeddings ou outra técnica de IA
     
-    # Por enquanto, simulamos a relevância com base em palavras-chave
-    results = []
-    query_terms = query.lower().split()
+    # Normalizar a consulta (BM25 independe da ordem e da repetição dos termos)
+    query_norm = " ".join(sorted(set(tokenize(query))))
+    top = _search_cached(
+        query_norm,
+        jurisdiction.lower() if jurisdiction else None,
+        category.lower() if category else None,
+        limit,
+        min_score
+    )
     
-    for law in all_laws:
-        # Filtrar por jurisdição, se especificada
-        if jurisdiction and law["jurisdiction"] != jurisdiction.lower():
-            continue
-            
-        # Filtrar por categoria, se especificada
-        if category and law["category"] != category.lower():
-            continue
-            
-        # Calcular pontuação de relevância simulada
-        title_lower = law["title"].lower()
-        content_lower = law["content"].lower()
-        
-        # Contagem simples de termos presentes
-        term_matches = sum(1 for term in query_terms if term in title_lower or term in content_lower)
-        
-        # Dar mais peso para correspondências no título
-        title_matches = sum(1 for term in query_terms if term in title_lower)
+    # Copiar apenas os documentos selecionados
+    return [{**_SEARCHABLE_LAWS[doc_id], "relevance_score": score} for doc_id, score in top]
+
+@lru_cache(maxsize=1024)
+def _search_cached(
+    query_norm: str,
+    jurisdiction: Optional[str],
+    category: Optional[str],
+    limit: int,
+    min_score: float
+) -> Tuple[Tuple[int, float], ...]:
+    """
+    Calcula o ranking de uma busca normalizada, memorizando o resultado.
+    
+    Args:
+        query_norm: Termos da busca, únicos e ordenados
+        jurisdiction: Jurisdição em minúsculas
+        category: Categoria em minúsculas
+        limit: Número máximo de resultados
+        min_score: Pontuação mínima de relevância
         
-        # Pontuação baseada na proporção de termos correspondentes
-        score = (term_matches / len(query_terms)) * 0.7 + (title_matches / len(query_terms)) * 0.3
+    Returns:
+        Tupla imutável de pares (ID do documento, pontuação), do mais relevante ao menos
+    """
+    # Pontuamos a relevância com BM25 sobre título e conteúdo
+    candidates = None
+    
+    # Filtrar por jurisdição, se especificada
+    if jurisdiction:
+        candidates = _LAW_IDS_BY_JURISDICTION.get(jurisdiction, set())
         
-        # Adicionar alguma aleatoriedade para simular variação nos resultados
-        score = min(1.0, score + random.uniform(-0.1, 0.1))
+    # Filtrar por categoria, se especificada
+    if category:
+        category_ids = _LAW_IDS_BY_CATEGORY.get(category, set())
+        candidates = category_ids if candidates is None else candidates & category_ids
         
-        if score >= min_score:
-            law_copy = law.copy()
-            law_copy["relevance_score"] = score
-            results.append(law_copy)
-    
-    # Ordenar por relevância
-    results.sort(key=lambda x: x["relevance_score"], reverse=True)
+    scores = _LAW_INDEX.search(query_norm, candidates)
     
-    # Limitar o número de resultados
-    return results[:limit]
+    # Selecionar os mais relevantes sem ordenar todos os resultados (empates: menor ID primeiro)
+    top = heapq.nlargest(limit, ((score, -doc_id) for doc_id, score in scores.items() if score >= min_score))
+    return tuple((-neg_doc_id, score) for score, neg_doc_id in top)
+
+def clear_search_cache() -> None:
+    """
+    Descarta os rankings memorizados. Deve ser chamada sempre que o catálogo
+    de leis internacionais for alterado.
+    """
+    _search_cached.cache_clear()
+
+# Legislações de Singapura da mais recente para a mais antiga (empates: ordem do catálogo), geral e por categoria
+_SINGAPORE_BY_UPDATED = sorted(MOCK_SINGAPORE_LAWS, key=itemgetter("last_updated"), reverse=True)
+_SINGAPORE_BY_CATEGORY_SORTED: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+for _law in _SINGAPORE_BY_UPDATED:
+    _SINGAPORE_BY_CATEGORY_SORTED[_law["category"]].append(_law)
+
+# Relevância das regulamentações alfandegárias: base e bônus para código HS idêntico ao consultado
+CUSTOMS_BASE_SCORE = 0.7
+CUSTOMS_EXACT_HS_BONUS = 0.3
+
+# IDs das regulamentações alfandegárias por (país, tipo), com None como curinga em cada posição,
+# e por prefixo de código HS; códigos HS exatos de cada regulamentação
+_CUSTOMS_IDS_BY_KEY: Dict[Tuple[Optional[str], Optional[str]], Set[int]] = defaultdict(set)
+_CUSTOMS_IDS_BY_HS_PREFIX: Dict[str, Set[int]] = defaultdict(set)
+_CUSTOMS_IDS_WITHOUT_HS = set()
+_CUSTOMS_HS_CODES = [frozenset(_regulation["hs_codes"]) for _regulation in MOCK_CUSTOMS_REGULATIONS]
+for _doc_id, _regulation in enumerate(MOCK_CUSTOMS_REGULATIONS):
+    for _key in (
+        (_regulation["country"], _regulation["regulation_type"]),
+        (_regulation["country"], None),
+        (None, _regulation["regulation_type"]),
+        (None, None),
+    ):
+        _CUSTOMS_IDS_BY_KEY[_key].add(_doc_id)
+    if not _regulation["hs_codes"]:
+        # Regulamentações sem códigos HS se aplicam a qualquer produto
+        _CUSTOMS_IDS_WITHOUT_HS.add(_doc_id)
+    for _code in _regulation["hs_codes"]:
+        # Todos os prefixos da parte antes do ponto (capítulo/posição), como em code.startswith(prefixo)
+        _heading = _code.split('.')[0]
+        for _length in range(len(_heading) + 1):
+            _CUSTOMS_IDS_BY_HS_PREFIX[_heading[:_length]].add(_doc_id)
 
 def get_singapore_legislation(
     category: Optional[str] = None,
@@ -243,21 +344,15 @@ def get_singapore_legislation(
     Returns:
         Lista de legislações de Singapura
     """
-    # Filtrar por categoria, se especificada
+    # Filtrar por categoria, se especificada (listas já ordenadas por atualização)
     if category:
-        results = [law for law in MOCK_SINGAPORE_LAWS if law["category"] == category.lower()]
+        results = _SINGAPORE_BY_CATEGORY_SORTED.get(category.lower(), [])
     else:
-        results = MOCK_SINGAPORE_LAWS.copy()
+        results = _SINGAPORE_BY_UPDATED
     
-    # Adicionar pontuações de relevância aleatórias para ordenação
-    for law in results:
-        law["relevance_score"] = random.uniform(0.5, 1.0)
-    
-    # Ordenar por relevância
-    results.sort(key=lambda x: x["relevance_score"], reverse=True)
-    
-    # Limitar o número de resultados
-    return results[:limit]
+    # Sem termo de busca, todas as legislações têm a mesma relevância (mais recentes primeiro);
+    # as cópias evitam alterar os registros compartilhados
+    return [{**law, "relevance_score": 1.0} for law in results[:limit]]
 
 def get_customs_regulations(
     country: Optional[str] = None,
@@ -277,38 +372,71 @@ def get_customs_regulations(
     Returns:
         Lista de regulamentações alfandegárias
     """
+    # Filtrar por país e tipo de regulamentação com uma única consulta ao índice
+    candidates = _CUSTOMS_IDS_BY_KEY.get(
+        (country.lower() if country else None, regulation_type.lower() if regulation_type else None),
+        set()
+    )
+        
+    # Filtrar por código HS
+    if product_code:
+        hs_ids = _CUSTOMS_IDS_BY_HS_PREFIX.get(product_code.split('.')[0], set())
+        candidates = candidates & (hs_ids | _CUSTOMS_IDS_WITHOUT_HS)
+        
     results = []
     
-    for regulation in MOCK_CUSTOMS_REGULATIONS:
-        # Filtrar por país
-        if country and regulation["country"] != country.lower():
-            continue
-            
-        # Filtrar por tipo de regulamentação
-        if regulation_type and regulation["regulation_type"] != regulation_type.lower():
-            continue
-            
-        # Filtrar por código HS
-        if product_code and regulation["hs_codes"] and not any(
-            code.startswith(product_code.split('.')[0]) for code in regulation["hs_codes"]
-        ):
-            continue
-            
-        # Adicionar pontuação de relevância simulada
-        regulation_copy = regulation.copy()
-        regulation_copy["relevance_score"] = random.uniform(0.5, 1.0)
+    for doc_id in sorted(candidates):
+        # Pontuação de relevância base
+        score = CUSTOMS_BASE_SCORE
         
         # Dar prioridade a regulamentos com códigos HS correspondentes exatos
-        if product_code and regulation["hs_codes"] and any(code == product_code for code in regulation["hs_codes"]):
-            regulation_copy["relevance_score"] += 0.3
+        if product_code and product_code in _CUSTOMS_HS_CODES[doc_id]:
+            score += CUSTOMS_EXACT_HS_BONUS
             
-        results.append(regulation_copy)
+        # Empates: menor ID primeiro
+        results.append((score, -doc_id))
     
-    # Ordenar por relevância
-    results.sort(key=lambda x: x["relevance_score"], reverse=True)
+    # Selecionar os mais relevantes e copiar apenas esses documentos
+    return [
+        {**MOCK_CUSTOMS_REGULATIONS[-neg_doc_id], "relevance_score": score}
+        for score, neg_doc_id in heapq.nlargest(limit, results)
+    ]
+
+# Resolução do carimbo de data/hora das análises (segundos) e último valor formatado
+_ISO_NOW_RESOLUTION = 0.001
+_iso_now_cache = (0.0, "")
+
+def _iso_now() -> str:
+    """
+    Retorna a data/hora atual em ISO 8601, reaproveitando a string formatada
+    enquanto o relógio não avançar mais que `_ISO_NOW_RESOLUTION`.
     
-    # Limitar o número de resultados
-    return results[:limit]
+    Returns:
+        Data/hora atual em ISO 8601
+    """
+    global _iso_now_cache
+    now = time.time()
+    cached_at, formatted = _iso_now_cache
+    if now - cached_at > _ISO_NOW_RESOLUTION:
+        # Substituição atômica do par (instante, string) entre threads
+        formatted = datetime.fromtimestamp(now).isoformat()
+        _iso_now_cache = (now, formatted)
+    return formatted
+
+# Gerador pseudoaleatório por thread (evita disputar o estado global do módulo random)
+_RNG = threading.local()
+
+def _thread_rng() -> random.Random:
+    """
+    Retorna o gerador pseudoaleatório da thread atual, criando-o no primeiro uso.
+    
+    Returns:
+        Instância de random.Random exclusiva da thread
+    """
+    rng = getattr(_RNG, "instance", None)
+    if rng is None:
+        rng = _RNG.instance = random.Random()
+    return rng
 
 def analyze_customs_document(
     document_type: str,
@@ -324,37 +452,34 @@ def analyze_customs_document(
     Returns:
         Análise de conformidade e recomendações
     """
-    if document_type not in MOCK_DOCUMENT_ANALYSES:
-        return {
-            "status": "error",
-            "message": f"Tipo de documento não suportado: {document_type}",
-            "supported_types": list(MOCK_DOCUMENT_ANALYSES.keys())
-        }
-    
-    template = MOCK_DOCUMENT_ANALYSES[document_type]
+    template = _TEMPLATES.get(document_type)
+    if template is None:
+        return {**_UNSUPPORTED_TEMPLATE, "message": f"Tipo de documento não suportado: {document_type}"}
     
-    # Verificar campos obrigatórios
-    missing_fields = [field for field in template["template_fields"] 
-                     if field not in document_content or not document_content[field]]
+    # Campos preenchidos, obtidos em uma única passagem pelo conteúdo
+    present = {field for field, value in document_content.items() if value}
     
-    # Verificar informações adicionais necessárias
-    missing_info = [info for info in template["required_info"] 
-                   if info not in document_content or not document_content[info]]
+    # Verificar campos obrigatórios e informações adicionais necessárias (na ordem do modelo)
+    missing_field_set = template.field_set - present
+    missing_info_set = template.required_info_set - present
+    missing_fields = [field for field in template.fields if field in missing_field_set] if missing_field_set else []
+    missing_info = [info for info in template.required_info if info in missing_info_set] if missing_info_set else []
     
     # Simular verificações de conformidade
     compliance_issues = []
     compliance_status = "compliant"
     
     # Simular problemas aleatórios para demonstração
-    if random.random() < 0.3:
+    rng = _thread_rng()
+    if rng.random() < 0.3:
         compliance_issues.append("Informações inconsistentes com outras documentações")
         compliance_status = "warning"
         
-    if random.random() < 0.2:
+    if rng.random() < 0.2:
         compliance_issues.append("Classificação incorreta de código HS")
         compliance_status = "non_compliant"
         
-    if document_type == "certificate_of_origin" and random.random() < 0.25:
+    if document_type == "certificate_of_origin" and rng.random() < 0.25:
         compliance_issues.append("Assinatura ou carimbo ausente/inválido")
         compliance_status = "non_compliant"
     
@@ -362,7 +487,7 @@ def analyze_customs_document(
     result = {
         "status": "success",
         "document_type": document_type,
-        "analysis_timestamp": datetime.now().isoformat(),
+        "analysis_timestamp": _iso_now(),
         "missing_fields": missing_fields,
         "missing_info": missing_info,
         "compliance_status": compliance_status,
@@ -1,7 +1,14 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+from collections import defaultdict
 from datetime import datetime
+from operator import itemgetter
 import uuid
-import random
+from fastapi.concurrency import run_in_threadpool
+from ..core.bm25 import BM25Index
+from ..core.cache import get_cached_legal_references, cache_legal_references
+
+# Chave de ordenação por relevância
+_BY_SCORE = itemgetter("relevance_score")
 
 # Dados mockados para desenvolvimento inicial
 MOCK_LEGAL_REFERENCES = [
@@ -37,12 +44,20 @@ MOCK_LEGAL_REFERENCES = [
     }
 ]
 
-def search_legal_references(
+# Índice BM25 construído uma única vez sobre título e conteúdo das referências
+_REFERENCE_INDEX = BM25Index([f"{reference['title']} {reference['content']}" for reference in MOCK_LEGAL_REFERENCES])
+
+# IDs das referências por tipo de fonte, para filtrar antes da pontuação
+_REFERENCE_IDS_BY_TYPE: Dict[str, Set[int]] = defaultdict(set)
+for _doc_id, _reference in enumerate(MOCK_LEGAL_REFERENCES):
+    _REFERENCE_IDS_BY_TYPE[_reference["type"]].add(_doc_id)
+
+async def search_legal_references(
     query: str,
     source_type: Optional[str] = None,
     limit: int = 10,
     min_score: float = 0.5
-) -> List[dict]:
+) -> Tuple[List[dict], str]:
     """
     Busca referências legais com base em um termo de pesquisa.
     
@@ -53,43 +68,44 @@ def search_legal_references(
         min_score: Pontuação mínima de relevância
         
     Returns:
-        Lista de referências legais que correspondem à pesquisa
+        Tupla (referências legais que correspondem à pesquisa, ETag dos resultados em cache)
     """
-    # Em um ambiente real, aqui faríamos uma busca vetorial ou semântica
-    # nos documentos jurídicos, usando embeddings ou outra técnica de IA
+    # Verificar se há resultados em cache (todos os resultados pontuados, antes dos filtros)
+    cached = await get_cached_legal_references(query, source_type)
+    if cached is not None:
+        results, etag = cached
+    else:
+        # A pontuação é síncrona; executá-la no threadpool para não bloquear o event loop
+        results = await run_in_threadpool(_score_references, query, source_type)
+        etag = await cache_legal_references(query, results, source_type)
     
-    # Por enquanto, simulamos a relevância com base em palavras-chave no título e conteúdo
-    results = []
-    query_terms = query.lower().split()
+    # Aplicar pontuação mínima e limitar o número de resultados
+    return [r for r in results if r["relevance_score"] >= min_score][:limit], etag
+
+def _score_references(query: str, source_type: Optional[str] = None) -> List[dict]:
+    """
+    Calcula a relevância de cada referência legal para a consulta.
     
-    for reference in MOCK_LEGAL_REFERENCES:
-        # Filtrar pelo tipo, se especificado
-        if source_type and reference["type"] != source_type:
-            continue
-            
-        # Calcular pontuação de relevância simulada
-        title_lower = reference["title"].lower()
-        content_lower = reference["content"].lower()
-        
-        # Contagem simples de termos presentes
-        term_matches = sum(1 for term in query_terms if term in title_lower or term in content_lower)
-        
-        # Dar mais peso para correspondências no título
-        title_matches = sum(1 for term in query_terms if term in title_lower)
-        
-        # Pontuação baseada na proporção de termos correspondentes e presença no título
-        score = (term_matches / len(query_terms)) * 0.7 + (title_matches / len(query_terms)) * 0.3
-        
-        # Adicionar alguma aleatoriedade para simular variação nos resultados
-        score = min(1.0, score + random.uniform(-0.1, 0.1))
+    Args:
+        query: Termo de busca
+        source_type: Tipo de fonte (lei, jurisprudencia, doutrina)
         
-        if score >= min_score:
-            reference_copy = reference.copy()
-            reference_copy["relevance_score"] = score
-            results.append(reference_copy)
+    Returns:
+        Lista de referências legais ordenada por relevância
+    """
+    # Em um ambiente real, aqui faríamos uma busca vetorial ou semântica
+    # nos documentos jurídicos, usando embeddings ou outra técnica de IA
     
-    # Ordenar por relevância
-    results.sort(key=lambda x: x["relevance_score"], reverse=True)
+    # Por enquanto, pontuamos a relevância com BM25 sobre título e conteúdo
+    candidates = _REFERENCE_IDS_BY_TYPE.get(source_type, set()) if source_type else None
+    scores = _REFERENCE_INDEX.search(query, candidates)
+    
+    results = []
+    for doc_id, score in sorted(scores.items()):
+        reference_copy = MOCK_LEGAL_REFERENCES[doc_id].copy()
+        reference_copy["relevance_score"] = score
+        results.append(reference_copy)
     
-    # Limitar o número de resultados
-    return results[:limit] 
\ No newline at end of file
+    # Ordenar por relevância (ordenação estável: empates mantêm a ordem do catálogo)
+    results.sort(key=_BY_SCORE, reverse=True)
+    return results
\ No newline at end of file
@@ -1,17 +1,22 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 from datetime import datetime
+from types import MappingProxyType
+from itertools import islice
 import uuid
 from ..core.cache import get_cached_recommendations, cache_recommendations
 
+# Instante de criação comum a todos os dados mockados
+_CREATED_AT = datetime.now()
+
 # Dados mockados para desenvolvimento inicial
-MOCK_RECOMMENDATIONS = [
+_RAW_RECOMMENDATIONS = [
     {
         "id": str(uuid.uuid4()),
         "title": "Atualização na Lei de Proteção de Dados",
         "description": "Novas diretrizes sobre proteção de dados pessoais em processos judiciais.",
         "source": "Legislação Federal",
         "relevance_score": 0.92,
-        "created_at": datetime.now(),
+        "created_at": _CREATED_AT,
         "category": "Proteção de Dados",
         "url": "https://example.com/lgpd-atualizacao"
     },
@@ -21,7 +26,7 @@ MOCK_RECOMMENDATIONS = [
         "description": "Decisão recente do STJ estabelece precedente para validade de contratos eletrônicos.",
         "source": "STJ",
         "relevance_score": 0.87,
-        "created_at": datetime.now(),
+        "created_at": _CREATED_AT,
         "category": "Direito Digital",
         "url": "https://example.com/stj-contratos-eletronicos"
     },
@@ -31,13 +36,39 @@ MOCK_RECOMMENDATIONS = [
         "description": "Análise dos impactos da inteligência artificial na prática jurídica contemporânea.",
         "source": "Revista de Direito Digital",
         "relevance_score": 0.85,
-        "created_at": datetime.now(),
+        "created_at": _CREATED_AT,
         "category": "Tecnologia Jurídica",
         "url": "https://example.com/ia-direito-impactos"
     }
 ]
 
-def get_recommendations_for_user(user_id: str, limit: int = 10, category: Optional[str] = None) -> List[dict]:
+# Catálogo imutável, ordenado por relevância (da maior para a menor)
+MOCK_RECOMMENDATIONS = tuple(
+    MappingProxyType(recommendation)
+    for recommendation in sorted(_RAW_RECOMMENDATIONS, key=lambda r: -r["relevance_score"])
+)
+
+async def _load_recommendations(user_id: str) -> List[dict]:
+    """
+    Gera as recomendações de um usuário, sem passar pelo cache.
+    
+    Args:
+        user_id: ID do usuário
+        
+    Returns:
+        Lista de recomendações
+    """
+    # Em um ambiente real, aqui buscaríamos recomendações personalizadas
+    # baseadas no perfil do usuário, histórico, etc.
+    # Por enquanto, usamos dados mockados (cópias: o catálogo compartilhado é somente leitura)
+    return [dict(recommendation) for recommendation in MOCK_RECOMMENDATIONS]
+
+async def get_recommendations_for_user(
+    user_id: str,
+    limit: int = 10,
+    category: Optional[str] = None,
+    force: bool = False
+) -> Tuple[Sequence[dict], str]:
     """
     Retorna recomendações personalizadas para um usuário.
     
@@ -45,26 +76,31 @@ def get_recommendations_for_user(user_id: str, limit: int = 10, category: Option
         user_id: ID do usuário
         limit: Número máximo de recomendações
         category: Categoria para filtrar as recomendações
+        force: Ignora o cache e recalcula as recomendações
     
     Returns:
-        Lista de recomendações
+        Tupla (recomendações, somente leitura, e ETag das recomendações em cache)
     """
-    # Verificar se há recomendações em cache
-    cached_recommendations = get_cached_recommendations(user_id)
-    if cached_recommendations:
-        recommendations = cached_recommendations
+    # Verificar se há recomendações em cache (expiradas são atualizadas em segundo plano)
+    cached = await get_cached_recommendations(
+        user_id, refresh=lambda: _load_recommendations(user_id), force=force
+    )
+    if cached:
+        recommendations, etag, by_category = cached
     else:
-        # Em um ambiente real, aqui buscaríamos recomendações personalizadas
-        # baseadas no perfil do usuário, histórico, etc.
-        # Por enquanto, usamos dados mockados
-        recommendations = MOCK_RECOMMENDATIONS
+        recommendations = await _load_recommendations(user_id)
         
         # Armazenar em cache
-        cache_recommendations(user_id, recommendations)
+        etag, by_category = await cache_recommendations(user_id, recommendations)
     
-    # Aplicar filtro de categoria se solicitado
+    # Aplicar filtro de categoria se solicitado (posições pré-indexadas, já ordenadas por relevância)
     if category:
-        recommendations = [r for r in recommendations if r["category"] == category]
+        positions = by_category.get(category)
+        if not positions:
+            return (), etag
+        return tuple(recommendations[i] for i in islice(positions, limit)), etag
     
-    # Limitar quantidade de resultados
-    return recommendations[:limit] 
\ No newline at end of file
+    # Limitar quantidade de resultados (sem cópia quando todas cabem no limite; o chamador só lê)
+    if limit >= len(recommendations):
+        return recommendations, etag
+    return recommendations[:limit], etag
\ No newline at end of file
@@ -4,9 +4,94 @@ Script para combinar um áudio com um vídeo existente.
 """
 import os
 import sys
+import json
+import shutil
 import argparse
-from datetime import datetime
-import moviepy.editor as mp
+import subprocess
+import time
+
+def _probe_duration(path):
+    """
+    Obtém a duração de um arquivo de mídia com o ffprobe.
+    
+    Args:
+        path (str): Caminho para o arquivo.
+        
+    Returns:
+        float: Duração em segundos.
+    """
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", path],
+        check=True, capture_output=True
+    )
+    return float(json.loads(result.stdout)["format"]["duration"])
+
+def _combine_with_ffmpeg(video_path, audio_path, output_path):
+    """
+    Combina áudio e vídeo com o ffmpeg, copiando o fluxo de vídeo sem recodificá-lo.
+    
+    Args:
+        video_path (str): Caminho para o vídeo.
+        audio_path (str): Caminho para o áudio.
+        output_path (str): Caminho para o vídeo de saída.
+    """
+    video_duration = _probe_duration(video_path)
+    audio_duration = _probe_duration(audio_path)
+    
+    # Ajustar a duração do resultado à da mídia mais curta
+    if video_duration > audio_duration:
+        print(f"Ajustando duração do vídeo para corresponder ao áudio: {audio_duration:.2f} segundos")
+    elif video_duration < audio_duration:
+        print(f"Aviso: O áudio é mais longo que o vídeo. Apenas {video_duration:.2f} segundos do áudio serão usados.")
+        
+    # Combinar o vídeo com o áudio (vídeo copiado; apenas o áudio é codificado em AAC)
+    print("Combinando vídeo e áudio...")
+    print(f"Salvando vídeo final: {output_path}")
+    subprocess.run(
+        ["ffmpeg", "-y", "-v", "error", "-i", video_path, "-i", audio_path,
+         "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", "aac",
+         "-t", f"{min(video_duration, audio_duration):.3f}", output_path],
+        check=True
+    )
+
+def _combine_with_moviepy(video_path, audio_path, output_path):
+    """
+    Combina áudio e vídeo com o MoviePy (recodifica o vídeo; usado quando o ffmpeg não está no PATH).
+    
+    Args:
+        video_path (str): Caminho para o vídeo.
+        audio_path (str): Caminho para o áudio.
+        output_path (str): Caminho para o vídeo de saída.
+    """
+    import moviepy.editor as mp
+    
+    # Carregar o vídeo e o áudio
+    print(f"Carregando vídeo: {video_path}")
+    video = mp.VideoFileClip(video_path)
+    
+    print(f"Carregando áudio: {audio_path}")
+    audio = mp.AudioFileClip(audio_path)
+    
+    # Ajustar a duração do vídeo para corresponder ao áudio
+    if video.duration > audio.duration:
+        print(f"Ajustando duração do vídeo para corresponder ao áudio: {audio.duration:.2f} segundos")
+        video = video.subclip(0, audio.duration)
+    elif video.duration < audio.duration:
+        print(f"Aviso: O áudio é mais longo que o vídeo. Apenas {video.duration:.2f} segundos do áudio serão usados.")
+        audio = audio.subclip(0, video.duration)
+        
+    # Combinar o vídeo com o áudio
+    print("Combinando vídeo e áudio...")
+    final_video = video.set_audio(audio)
+    
+    # Salvar o vídeo final
+    print(f"Salvando vídeo final: {output_path}")
+    final_video.write_videofile(output_path, codec='libx264', audio_codec='aac')
+    
+    # Fechar os clips
+    video.close()
+    audio.close()
+    final_video.close()
 
 def combine_audio_video(video_path, audio_path, output_path=None):
     """
@@ -32,39 +117,17 @@ def combine_audio_video(video_path, audio_path, output_path=None):
             
         # Gerar nome de arquivo baseado no timestamp se não for fornecido
         if not output_path:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = time.strftime('%Y%m%d_%H%M%S', time.localtime())
             output_dir = os.path.join(os.getcwd(), "output", "videos")
             os.makedirs(output_dir, exist_ok=True)
             output_path = os.path.join(output_dir, f"rapidinha_combined_{timestamp}.mp4")
             
-        # Carregar o vídeo e o áudio
-        print(f"Carregando vídeo: {video_path}")
-        video = mp.VideoFileClip(video_path)
-        
-        print(f"Carregando áudio: {audio_path}")
-        audio = mp.AudioFileClip(audio_path)
-        
-        # Ajustar a duração do vídeo para corresponder ao áudio
-        if video.duration > audio.duration:
-            print(f"Ajustando duração do vídeo para corresponder ao áudio: {audio.duration:.2f} segundos")
-            video = video.subclip(0, audio.duration)
-        elif video.duration < audio.duration:
-            print(f"Aviso: O áudio é mais longo que o vídeo. Apenas {video.duration:.2f} segundos do áudio serão usados.")
-            audio = audio.subclip(0, video.duration)
+        # Sem ffmpeg/ffprobe no PATH, recorrer ao MoviePy (mais lento, pois recodifica o vídeo)
+        if shutil.which("ffmpeg") and shutil.which("ffprobe"):
+            _combine_with_ffmpeg(video_path, audio_path, output_path)
+        else:
+            _combine_with_moviepy(video_path, audio_path, output_path)
             
-        # Combinar o vídeo com o áudio
-        print("Combinando vídeo e áudio...")
-        final_video = video.set_audio(audio)
-        
-        # Salvar o vídeo final
-        print(f"Salvando vídeo final: {output_path}")
-        final_video.write_videofile(output_path, codec='libx264', audio_codec='aac')
-        
-        # Fechar os clips
-        video.close()
-        audio.close()
-        final_video.close()
-        
         print(f"Vídeo combinado com sucesso: {output_path}")
         return output_path
         
@@ -5,9 +5,27 @@ Audio generation module for the CloneIA project.
 import os
 import json
 import time
+import uuid
+import asyncio
 import logging
+import itertools
+import mimetypes
+import httpx
+import orjson
 import requests
-from typing import Dict, List, Optional, Any, Union
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.retry import Retry
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
+
+try:
+    import av
+except ImportError:
+    av = None
 
 from core.utils import (
     load_api_key, load_voice_config, save_voice_config, 
@@ -18,11 +36,278 @@ from core.text import optimize_text
 
 logger = logging.getLogger('cloneia.audio')
 
+@lru_cache(maxsize=4096)
+def _optimize_text_cached(text: str) -> str:
+    """
+    Memoized `optimize_text` (the optimization is deterministic, so reruns of a script reuse it).
+    
+    Args:
+        text: Original text
+        
+    Returns:
+        str: Optimized text
+    """
+    return optimize_text(text)
+
+# Extensions of the source files for sample extraction
+_VIDEO_EXTENSIONS = frozenset({".mp4", ".avi", ".mov", ".mkv"})
+_AUDIO_EXTENSIONS = frozenset({".mp3", ".wav", ".m4a"})
+
+def _list_files(directory: str, extensions: frozenset) -> List[str]:
+    """
+    List the regular files of a directory with one of the given extensions.
+    
+    Args:
+        directory: Directory to scan
+        extensions: Accepted extensions (lowercase, with the dot)
+        
+    Returns:
+        List[str]: Paths to the matching files
+    """
+    # scandir reuses the directory entry's file type, avoiding a stat per file
+    with os.scandir(directory) as entries:
+        return [
+            entry.path for entry in entries
+            if entry.is_file(follow_symlinks=False) and os.path.splitext(entry.name)[1].lower() in extensions
+        ]
+
+# Response chunks gathered into each vectored write
+_WRITE_BATCH = 16
+
+def _write_chunks(output_path: str, chunks: Iterable[bytes]) -> None:
+    """
+    Write streamed chunks to a file, issuing one `os.writev` per batch of chunks instead of one write each.
+    
+    Args:
+        output_path: Path of the file to write
+        chunks: Byte chunks, in order
+    """
+    if not hasattr(os, "writev"):
+        with open(output_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        return
+    
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        batch = []
+        for chunk in itertools.chain(chunks, (None,)):
+            if chunk:
+                batch.append(memoryview(chunk))
+            if batch and (chunk is None or len(batch) == _WRITE_BATCH):
+                # writev may write only part of the batch; resume from where it stopped
+                while batch:
+                    written = os.writev(fd, batch)
+                    while batch and written >= len(batch[0]):
+                        written -= len(batch.pop(0))
+                    if written:
+                        batch[0] = batch[0][written:]
+    finally:
+        os.close(fd)
+
+# Container for stream-copied audio, by codec (anything else goes to Matroska audio)
+_COPY_EXTENSIONS = {
+    "mp3": "mp3",
+    "aac": "m4a",
+    "alac": "m4a",
+    "flac": "flac",
+    "opus": "ogg",
+    "vorbis": "ogg",
+}
+
+def _audio_duration(container) -> float:
+    """
+    Get the duration of the first audio stream of an open container.
+    
+    Args:
+        container: PyAV input container
+        
+    Returns:
+        float: Duration in seconds (0.0 if unknown)
+    """
+    stream = container.streams.audio[0]
+    if stream.duration is not None:
+        return float(stream.duration * stream.time_base)
+    if container.duration is not None:
+        return container.duration / av.time_base
+    return 0.0
+
+def _copy_audio_segment(container, output_base: str, start: float = 0.0,
+                        end: Optional[float] = None) -> Tuple[str, float]:
+    """
+    Copy a segment of the first audio stream of an open container to a new file,
+    remuxing the compressed packets without decoding or re-encoding them.
+    
+    Args:
+        container: PyAV input container
+        output_base: Output path without extension (the extension follows the codec)
+        start: Segment start in seconds
+        end: Segment end in seconds (if None, copies until the end of the stream)
+        
+    Returns:
+        Tuple[str, float]: Path to the written file and its duration in seconds
+    """
+    in_stream = container.streams.audio[0]
+    codec = in_stream.codec_context.codec.canonical_name
+    extension = "wav" if codec.startswith("pcm_") else _COPY_EXTENSIONS.get(codec, "mka")
+    output_path = f"{output_base}.{extension}"
+    
+    time_base = in_stream.time_base
+    origin = in_stream.start_time or 0
+    
+    # Seek to the last packet at or before the start, then skip what precedes it
+    container.seek(origin + int(start / time_base), stream=in_stream)
+    
+    first_pts = None
+    last_pts = None
+    with av.open(output_path, "w") as output:
+        out_stream = output.add_stream_from_template(in_stream)
+        
+        for packet in container.demux(in_stream):
+            # Flush packets carry no data
+            if packet.pts is None or packet.dts is None:
+                continue
+            
+            packet_time = float((packet.pts - origin) * time_base)
+            if packet_time < start:
+                continue
+            if end is not None and packet_time >= end:
+                break
+            
+            if first_pts is None:
+                first_pts = packet.pts
+            last_pts = packet.pts + (packet.duration or 0)
+            
+            # Rebase timestamps so the segment starts at zero
+            packet.pts -= first_pts
+            packet.dts -= first_pts
+            packet.stream = out_stream
+            output.mux(packet)
+    
+    duration = float((last_pts - first_pts) * time_base) if first_pts is not None else 0.0
+    return output_path, duration
+
+def _extract_from_video(video_file: str, output_base: str, max_duration: float) -> Optional[str]:
+    """
+    Copy the beginning of a video's audio track (runs in a worker process).
+    
+    Args:
+        video_file: Path to the video
+        output_base: Output path without extension
+        max_duration: Maximum duration of the sample in seconds
+        
+    Returns:
+        Optional[str]: Path to the extracted audio file, or None if failed
+    """
+    try:
+        # Copy the audio track only (video frames are never decoded), limited in duration
+        with av.open(video_file) as container:
+            if not container.streams.audio:
+                logger.warning(f"No audio track in video {video_file}")
+                return None
+            
+            audio_path, _ = _copy_audio_segment(container, output_base, 0.0, max_duration)
+        return audio_path
+        
+    except Exception as e:
+        logger.error(f"Error extracting audio from video {video_file}: {e}")
+        return None
+
+def _extract_from_one(audio_file: str, output_base: str, min_duration: float,
+                      max_duration: float, max_per_file: int) -> List[Tuple[str, float]]:
+    """
+    Copy up to `max_per_file` short samples from one audio file (runs in a worker process).
+    
+    Args:
+        audio_file: Path to the source audio file
+        output_base: Output path prefix (the sample number and extension are appended)
+        min_duration: Minimum duration of each sample in seconds
+        max_duration: Maximum duration of each sample in seconds
+        max_per_file: Maximum number of samples to extract from the file
+        
+    Returns:
+        List[Tuple[str, float]]: Path and duration of each extracted sample
+    """
+    samples = []
+    try:
+        with av.open(audio_file) as container:
+            duration = _audio_duration(container)
+            
+            # Skip if too short
+            if duration < min_duration:
+                return samples
+            
+            for i in range(max_per_file):
+                # Determine start time (avoid the first and last 1 second)
+                max_start = max(0, duration - max_duration - 1)
+                if max_start <= 1:
+                    start_time = 1
+                else:
+                    start_time = 1 + (i * max_start / max_per_file)
+                
+                # Determine end time
+                end_time = min(start_time + max_duration, duration - 1)
+                
+                # Ensure minimum duration
+                if end_time - start_time < min_duration:
+                    continue
+                
+                # Copy the sample without re-encoding
+                samples.append(_copy_audio_segment(container, f"{output_base}_{i+1}", start_time, end_time))
+                
+    except Exception as e:
+        logger.error(f"Error extracting short sample from {audio_file}: {e}")
+    return samples
+
+def _remove_parts(parts: List[Tuple[str, float]]) -> None:
+    """
+    Delete temporary sample files that will not be used.
+    
+    Args:
+        parts: Path and duration of each temporary sample
+    """
+    for part_path, _ in parts:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+def _multipart_chunks(fields: List[Tuple[str, str]], audio_files: Iterable[str],
+                      boundary: str) -> Iterator[bytes]:
+    """
+    Encode a multipart/form-data body lazily, reading each audio file only when the upload reaches it.
+    
+    Args:
+        fields: Plain form fields sent before the files
+        audio_files: Paths of the audio files (consumed as the body is sent)
+        boundary: Multipart boundary
+        
+    Yields:
+        bytes: Next chunk of the request body
+    """
+    for name, value in fields:
+        yield (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        ).encode('utf-8')
+    
+    for audio_file in audio_files:
+        content_type = mimetypes.guess_type(audio_file)[0] or 'audio/mpeg'
+        yield (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files"; '
+            f'filename="{os.path.basename(audio_file)}"\r\nContent-Type: {content_type}\r\n\r\n'
+        ).encode('utf-8')
+        with open(audio_file, 'rb') as f:
+            while chunk := f.read(65536):
+                yield chunk
+        yield b'\r\n'
+    
+    yield f'--{boundary}--\r\n'.encode('utf-8')
+
 class AudioGenerator:
     """
     Class for generating audio from text using the ElevenLabs API.
     """
     
+    __slots__ = ("api_key", "audio_dir", "voice_settings", "voice_id", "voice_name", "_session", "_voice_settings_json")
+    
     def __init__(self, api_key: Optional[str] = None, voice_profile: Optional[str] = None):
         """
         Initialize the audio generator.
@@ -34,12 +319,30 @@ class AudioGenerator:
         # API key
         self.api_key = api_key or load_api_key()
         
+        # Reusable HTTP session (connection pool + keep-alive); MP3 is already compressed, so no gzip
+        self._session = requests.Session()
+        self._session.headers["Accept-Encoding"] = "identity"
+        if self.api_key:
+            self._session.headers["xi-api-key"] = self.api_key
+        self._session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=32))
+        
+        # Text-to-speech requests are safe to repeat on transient failures (voice creation is not,
+        # and its streamed multipart body cannot be replayed)
+        self._session.mount("https://api.elevenlabs.io/v1/text-to-speech/", HTTPAdapter(
+            pool_connections=8, pool_maxsize=32,
+            max_retries=Retry(
+                total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({"POST"}), raise_on_status=False
+            )
+        ))
+        
         # Directory for storing generated audio
         self.audio_dir = os.path.join(OUTPUT_DIR, "audio")
         ensure_directory(self.audio_dir)
         
         # Voice settings
         self.voice_settings = DEFAULT_VOICE_SETTINGS.copy()
+        self._voice_settings_json = (None, b'')  # (settings snapshot, encoded body suffix)
         
         # Load voice configuration
         self.voice_id = None
@@ -89,7 +392,7 @@ class AudioGenerator:
         # Optimize text if requested
         if optimize:
             original_text = text
-            text = optimize_text(text)
+            text = _optimize_text_cached(text)
             logger.info(f"Text optimized: {len(original_text)} chars -> {len(text)} chars")
         
         # Generate output path if not provided
@@ -106,32 +409,18 @@ class AudioGenerator:
             return output_path
         
         try:
-            # Check if we have a configured voice
-            voice_identifier = self.voice_id if self.voice_id else "Rachel"
-            
             # Prepare the API request
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_identifier}"
-            
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.api_key
-            }
-            
-            data = {
-                "text": text,
-                "model_id": self.voice_settings.get("model_id", "eleven_multilingual_v2"),
-                "voice_settings": self.voice_settings
-            }
+            url, headers = self._tts_endpoint()
+            data = self._tts_body(text)
             
             # Make the API request
             logger.info(f"Generating audio for text: '{text[:50]}...'")
-            response = requests.post(url, json=data, headers=headers, timeout=60)
-            response.raise_for_status()
+            response = self._session.post(url, data=data, headers=headers, timeout=60, stream=True)
             
-            # Save the audio
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
+            # Save the audio as it arrives, without holding the whole MP3 in memory
+            with response:
+                response.raise_for_status()
+                _write_chunks(output_path, response.iter_content(chunk_size=64 * 1024))
             
             logger.info(f"Audio generated successfully: {output_path}")
             return output_path
@@ -143,13 +432,139 @@ class AudioGenerator:
             logger.error(f"Error generating audio: {e}")
             return None
     
-    def clone_voice(self, audio_files: List[str], voice_name: str = "Rapidinha Voice",
+    def _tts_endpoint(self) -> Tuple[str, Dict[str, str]]:
+        """
+        Build the text-to-speech URL and headers for the configured voice.
+        
+        Returns:
+            Tuple[str, Dict[str, str]]: Endpoint URL and request headers
+        """
+        # Check if we have a configured voice
+        voice_identifier = self.voice_id if self.voice_id else "Rachel"
+        
+        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_identifier}"
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.api_key
+        }
+        return url, headers
+    
+    def _tts_body(self, text: str) -> bytes:
+        """
+        Build the text-to-speech request body, reusing the encoded voice settings between requests.
+        
+        Args:
+            text: Text to convert to audio
+            
+        Returns:
+            bytes: JSON request body
+        """
+        # Re-encode the settings only when they changed (they may be updated in place)
+        settings, encoded = self._voice_settings_json
+        if settings != self.voice_settings:
+            settings = dict(self.voice_settings)
+            model_id = settings.get("model_id", "eleven_multilingual_v2")
+            encoded = (
+                b',"model_id":' + json.dumps(model_id).encode('utf-8') +
+                b',"voice_settings":' + json.dumps(settings, separators=(',', ':')).encode('utf-8') + b'}'
+            )
+            self._voice_settings_json = (settings, encoded)
+        
+        return b'{"text":' + json.dumps(text).encode('utf-8') + encoded
+    
+    def generate_audio_batch(self, texts: List[str], output_paths: Optional[List[str]] = None,
+                             optimize: bool = True, concurrency: int = 8) -> List[Optional[str]]:
+        """
+        Generate audio for several texts concurrently over a shared connection pool.
+        
+        Args:
+            texts: Texts to convert to audio
+            output_paths: Path for each audio file (if None, generates names based on timestamp)
+            optimize: Whether to optimize the texts for speech
+            concurrency: Maximum number of simultaneous requests
+            
+        Returns:
+            List[Optional[str]]: Path to each generated audio file (None where it failed), in input order
+        """
+        if not self.api_key:
+            logger.error("ElevenLabs API key not configured. Cannot generate audio.")
+            return [None] * len(texts)
+        
+        # Optimize texts if requested
+        if optimize:
+            texts = [_optimize_text_cached(text) for text in texts]
+        
+        # Generate output paths if not provided
+        if not output_paths:
+            base, extension = os.path.splitext(get_timestamp_filename("rapidinha_audio", "mp3"))
+            output_paths = [
+                os.path.join(self.audio_dir, f"{base}_{i+1}{extension}") for i in range(len(texts))
+            ]
+        
+        return asyncio.run(self._generate_audio_batch_async(texts, output_paths, concurrency))
+    
+    async def _generate_audio_batch_async(self, texts: List[str], output_paths: List[str],
+                                          concurrency: int) -> List[Optional[str]]:
+        """
+        Asynchronous implementation of `generate_audio_batch`.
+        
+        Args:
+            texts: Texts to convert to audio
+            output_paths: Path for each audio file
+            concurrency: Maximum number of simultaneous requests
+            
+        Returns:
+            List[Optional[str]]: Path to each generated audio file (None where it failed), in input order
+        """
+        url, headers = self._tts_endpoint()
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        
+        async def generate(client, text, output_path):
+            async with semaphore:
+                try:
+                    return await self._agenerate_one(client, url, text, output_path)
+                except Exception as e:
+                    logger.error(f"Error generating audio for {output_path}: {e}")
+                    return None
+        
+        async with httpx.AsyncClient(headers=headers, limits=limits, timeout=60) as client:
+            return await asyncio.gather(
+                *(generate(client, text, output_path) for text, output_path in zip(texts, output_paths))
+            )
+    
+    async def _agenerate_one(self, client: httpx.AsyncClient, url: str, text: str, output_path: str) -> str:
+        """
+        Generate one audio file, streaming the response to disk.
+        
+        Args:
+            client: Shared asynchronous HTTP client
+            url: Text-to-speech endpoint
+            text: Text to convert to audio
+            output_path: Path to save the audio file
+            
+        Returns:
+            str: Path to the generated audio file
+        """
+        logger.info(f"Generating audio for text: '{text[:50]}...'")
+        async with client.stream("POST", url, content=self._tts_body(text)) as response:
+            response.raise_for_status()
+            with open(output_path, 'wb') as f:
+                async for chunk in response.aiter_bytes(chunk_size=64 * 1024):
+                    f.write(chunk)
+        
+        logger.info(f"Audio generated successfully: {output_path}")
+        return output_path
+    
+    def clone_voice(self, audio_files: Iterable[str], voice_name: str = "Rapidinha Voice",
                    dry_run: bool = False) -> Optional[str]:
         """
         Clone a voice from audio files.
         
         Args:
-            audio_files: List of paths to audio files
+            audio_files: Paths to audio files, or (path, duration) pairs; a lazy iterable
+                (e.g. `iter_short_samples`) is uploaded as it is produced
             voice_name: Name of the voice to create
             dry_run: If True, simulates the cloning without making API calls
             
@@ -160,14 +575,27 @@ class AudioGenerator:
             logger.error("ElevenLabs API key not configured. Cannot clone voice.")
             return None
         
-        # Verify valid audio files
-        valid_files = [f for f in audio_files if os.path.exists(f)]
+        # Verify valid audio files (a lazy iterable is checked as it is consumed, so the upload
+        # can start while later samples are still being extracted)
+        lazy = not isinstance(audio_files, (list, tuple)) and not dry_run
+        paths = (f[0] if isinstance(f, tuple) else f for f in audio_files)
+        valid_files = (f for f in paths if os.path.exists(f))
+        try:
+            first_file = next(valid_files, None)
+        except Exception as e:
+            logger.error(f"Error reading audio files: {e}")
+            return None
         
-        if not valid_files:
+        if first_file is None:
             logger.error("No valid audio files found.")
             return None
         
-        logger.info(f"Cloning voice from {len(valid_files)} audio files...")
+        if lazy:
+            valid_files = itertools.chain((first_file,), valid_files)
+            logger.info("Cloning voice from streamed audio files...")
+        else:
+            valid_files = [first_file, *valid_files]
+            logger.info(f"Cloning voice from {len(valid_files)} audio files...")
         
         # Simulation mode
         if dry_run:
@@ -191,21 +619,29 @@ class AudioGenerator:
             return simulated_id
         
         try:
-            # Prepare files for upload
-            files = []
-            for audio_file in valid_files:
-                with open(audio_file, 'rb') as f:
-                    files.append(('files', (os.path.basename(audio_file), f.read(), 'audio/mpeg')))
-            
             # Make the API request
             url = "https://api.elevenlabs.io/v1/voices/add"
-            headers = {"xi-api-key": self.api_key}
-            data = {
-                "name": voice_name,
-                "description": "Cloned voice for Rapidinha Cripto"
-            }
             
-            response = requests.post(url, headers=headers, data=data, files=files)
+            fields = [
+                ("name", voice_name),
+                ("description", "Cloned voice for Rapidinha Cripto")
+            ]
+            
+            if lazy:
+                # Unknown length: send the body with chunked transfer encoding as the files arrive
+                boundary = uuid.uuid4().hex
+                headers = {"xi-api-key": self.api_key, "Content-Type": f"multipart/form-data; boundary={boundary}"}
+                response = self._session.post(url, headers=headers, data=_multipart_chunks(fields, valid_files, boundary))
+            else:
+                # Stream the multipart body straight from the open files, without loading them into memory
+                with ExitStack() as stack:
+                    for audio_file in valid_files:
+                        content_type = mimetypes.guess_type(audio_file)[0] or 'audio/mpeg'
+                        fields.append(('files', (os.path.basename(audio_file), stack.enter_context(open(audio_file, 'rb')), content_type)))
+                    
+                    encoder = MultipartEncoder(fields=fields)
+                    headers = {"xi-api-key": self.api_key, "Content-Type": encoder.content_type}
+                    response = self._session.post(url, headers=headers, data=encoder)
             response.raise_for_status()
             
             # Process the response
@@ -240,6 +676,32 @@ class AudioGenerator:
             logger.error(f"Error cloning voice: {e}")
             return None
     
+    def clone_from_samples(self, source_dir: str, output_dir: Optional[str] = None,
+                           min_duration: float = 7.0, max_duration: float = 12.0,
+                           num_samples: int = 40, voice_name: str = "Rapidinha Voice",
+                           dry_run: bool = False) -> Optional[str]:
+        """
+        Extract short samples and clone a voice from them, uploading each sample as soon as it is extracted.
+        
+        Args:
+            source_dir: Directory containing source audio files
+            output_dir: Directory to save short samples (if None, uses default)
+            min_duration: Minimum duration of each sample in seconds
+            max_duration: Maximum duration of each sample in seconds
+            num_samples: Number of samples to extract
+            voice_name: Name of the voice to create
+            dry_run: If True, simulates the cloning without making API calls
+            
+        Returns:
+            Optional[str]: ID of the cloned voice, or None if failed
+        """
+        samples = self.iter_short_samples(source_dir, output_dir, min_duration, max_duration, num_samples)
+        try:
+            return self.clone_voice(samples, voice_name, dry_run)
+        finally:
+            # Stops pending extraction (and removes unused parts) if the upload ended early
+            samples.close()
+    
     def extract_audio_samples(self, video_dir: str, output_dir: Optional[str] = None,
                              max_samples: int = 5, max_duration: int = 30) -> List[str]:
         """
@@ -254,10 +716,8 @@ class AudioGenerator:
         Returns:
             List[str]: List of paths to extracted audio files
         """
-        try:
-            import moviepy.editor as mp
-        except ImportError:
-            logger.error("Error: moviepy library not found. Install moviepy.")
+        if av is None:
+            logger.error("Error: PyAV library not found. Install av.")
             return []
         
         # Directory for storing samples
@@ -268,10 +728,7 @@ class AudioGenerator:
         
         try:
             # List all videos in the directory
-            video_files = []
-            for filename in os.listdir(video_dir):
-                if filename.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                    video_files.append(os.path.join(video_dir, filename))
+            video_files = _list_files(video_dir, _VIDEO_EXTENSIONS)
             
             if not video_files:
                 logger.warning("No videos found in the directory.")
@@ -280,29 +737,15 @@ class AudioGenerator:
             # Limit the number of videos
             video_files = video_files[:max_samples]
             
-            # Extract audio samples
-            audio_samples = []
-            for i, video_file in enumerate(video_files):
-                try:
-                    # Extract audio from video
-                    video = mp.VideoFileClip(video_file)
-                    
-                    # Limit duration
-                    if video.duration > max_duration:
-                        video = video.subclip(0, max_duration)
-                    
-                    # Save audio
-                    audio_path = os.path.join(output_dir, f"sample_{i+1}.mp3")
-                    video.audio.write_audiofile(audio_path, codec='mp3')
-                    
-                    # Add to list of samples
-                    audio_samples.append(audio_path)
-                    
-                    # Close video
-                    video.close()
-                    
-                except Exception as e:
-                    logger.error(f"Error extracting audio from video {video_file}: {e}")
+            # Extract audio samples in parallel (one process per video)
+            with ProcessPoolExecutor(max_workers=min(len(video_files), os.cpu_count() or 1)) as executor:
+                results = executor.map(
+                    _extract_from_video,
+                    video_files,
+                    [os.path.join(output_dir, f"sample_{i+1}") for i in range(len(video_files))],
+                    [max_duration] * len(video_files)
+                )
+                audio_samples = [audio_path for audio_path in results if audio_path]
             
             logger.info(f"Extracted {len(audio_samples)} audio samples for voice cloning.")
             return audio_samples
@@ -311,11 +754,11 @@ class AudioGenerator:
             logger.error(f"Error extracting audio samples: {e}")
             return []
     
-    def extract_short_samples(self, source_dir: str, output_dir: Optional[str] = None,
-                             min_duration: float = 7.0, max_duration: float = 12.0,
-                             num_samples: int = 40) -> List[str]:
+    def iter_short_samples(self, source_dir: str, output_dir: Optional[str] = None,
+                           min_duration: float = 7.0, max_duration: float = 12.0,
+                           num_samples: int = 40) -> Iterator[Tuple[str, float]]:
         """
-        Extract short audio samples from longer audio files.
+        Extract short audio samples from longer audio files, yielding each one as soon as it is ready.
         
         Args:
             source_dir: Directory containing source audio files
@@ -324,14 +767,12 @@ class AudioGenerator:
             max_duration: Maximum duration of each sample in seconds
             num_samples: Number of samples to extract
             
-        Returns:
-            List[str]: List of paths to extracted audio files
+        Yields:
+            Tuple[str, float]: Path and duration of each extracted sample, in file order
         """
-        try:
-            import moviepy.editor as mp
-        except ImportError:
-            logger.error("Error: moviepy library not found. Install moviepy.")
-            return []
+        if av is None:
+            logger.error("Error: PyAV library not found. Install av.")
+            return
         
         # Directory for storing samples
         if not output_dir:
@@ -339,88 +780,115 @@ class AudioGenerator:
         
         ensure_directory(output_dir)
         
-        try:
-            # List all audio files in the directory
-            audio_files = []
-            for filename in os.listdir(source_dir):
-                if filename.lower().endswith(('.mp3', '.wav', '.m4a')):
-                    audio_files.append(os.path.join(source_dir, filename))
-            
-            if not audio_files:
-                logger.warning("No audio files found in the directory.")
-                return []
-            
-            # Extract short samples
-            short_samples = []
-            sample_count = 0
-            
-            for audio_file in audio_files:
-                if sample_count >= num_samples:
-                    break
-                
-                try:
-                    # Load audio file
-                    audio = mp.AudioFileClip(audio_file)
+        # List all audio files in the directory
+        audio_files = _list_files(source_dir, _AUDIO_EXTENSIONS)
+        
+        if not audio_files:
+            logger.warning("No audio files found in the directory.")
+            return
+        
+        # Extract short samples in parallel (one task per file), writing to temporary names. Each file
+        # gets the quota a sequential pass would give it (up to 3 of the samples still missing): files
+        # are submitted ahead assuming earlier ones yield their full quota, and a file whose quota
+        # turns out wrong (an earlier file fell short) is extracted again with the exact one
+        sample_count = 0
+        planned = 0  # samples collected plus those expected from the files in flight
+        next_file = 0
+        pending = deque()  # (index, quota, future) of the files in flight, in file order
+        results = []
+        workers = min(len(audio_files), os.cpu_count() or 1)
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            def submit(index, quota):
+                return executor.submit(
+                    _extract_from_one, audio_files[index], os.path.join(output_dir, f".part_{index}"),
+                    min_duration, max_duration, quota
+                )
+            
+            try:
+                while sample_count < num_samples:
+                    # Keep the workers busy with the files expected to be needed
+                    while next_file < len(audio_files) and len(pending) < workers and planned < num_samples:
+                        quota = min(3, num_samples - planned)
+                        pending.append((next_file, quota, submit(next_file, quota)))
+                        planned += quota
+                        next_file += 1
                     
-                    # Skip if too short
-                    if audio.duration < min_duration:
-                        continue
+                    if not pending:
+                        break
                     
-                    # Determine number of samples to extract from this file
-                    file_samples = min(3, num_samples - sample_count)
+                    index, quota, future = pending.popleft()
+                    results = future.result()
+                    exact_quota = min(3, num_samples - sample_count)
+                    if quota != exact_quota:
+                        _remove_parts(results)
+                        results = submit(index, exact_quota).result()
+                    planned += len(results) - quota
                     
-                    for i in range(file_samples):
-                        # Determine start time (avoid the first and last 1 second)
-                        max_start = max(0, audio.duration - max_duration - 1)
-                        if max_start <= 1:
-                            start_time = 1
-                        else:
-                            start_time = 1 + (i * max_start / file_samples)
-                        
-                        # Determine end time
-                        end_time = min(start_time + max_duration, audio.duration - 1)
-                        
-                        # Ensure minimum duration
-                        if end_time - start_time < min_duration:
-                            continue
-                        
-                        # Extract sample
-                        sample = audio.subclip(start_time, end_time)
-                        
-                        # Save sample
-                        sample_path = os.path.join(output_dir, f"short_sample_{sample_count+1}.mp3")
-                        sample.write_audiofile(sample_path, codec='mp3')
-                        
-                        # Add to list of samples
-                        short_samples.append(sample_path)
+                    # Number the samples in file order
+                    while results:
+                        part_path, sample_duration = results.pop(0)
+                        sample_path = os.path.join(
+                            output_dir, f"short_sample_{sample_count+1}{os.path.splitext(part_path)[1]}"
+                        )
+                        os.replace(part_path, sample_path)
                         sample_count += 1
-                    
-                    # Close audio
-                    audio.close()
-                    
-                except Exception as e:
-                    logger.error(f"Error extracting short sample from {audio_file}: {e}")
+                        
+                        yield sample_path, sample_duration
+            finally:
+                # If the consumer stopped early, drop the files that were never handed out
+                _remove_parts(results)
+                for _, _, future in pending:
+                    if not future.cancel() and future.exception() is None:
+                        _remove_parts(future.result())
+    
+    def extract_short_samples(self, source_dir: str, output_dir: Optional[str] = None,
+                             min_duration: float = 7.0, max_duration: float = 12.0,
+                             num_samples: int = 40) -> List[str]:
+        """
+        Extract short audio samples from longer audio files.
+        
+        Args:
+            source_dir: Directory containing source audio files
+            output_dir: Directory to save short samples (if None, uses default)
+            min_duration: Minimum duration of each sample in seconds
+            max_duration: Maximum duration of each sample in seconds
+            num_samples: Number of samples to extract
+            
+        Returns:
+            List[str]: List of paths to extracted audio files
+        """
+        if not output_dir:
+            output_dir = os.path.join(PROJECT_ROOT, "reference", "samples", "short_samples")
+        
+        try:
+            samples = list(self.iter_short_samples(
+                source_dir, output_dir, min_duration, max_duration, num_samples
+            ))
+            
+            if not samples:
+                return []
             
-            # Create a report
+            # Create a report (durations come from the copied packets; no file is reopened)
             report = {
-                "total_samples": len(short_samples),
+                "total_samples": len(samples),
                 "min_duration": min_duration,
                 "max_duration": max_duration,
                 "samples": [
                     {
                         "path": sample,
-                        "duration": mp.AudioFileClip(sample).duration
+                        "duration": duration
                     }
-                    for sample in short_samples
+                    for sample, duration in samples
                 ]
             }
             
             report_path = os.path.join(output_dir, "duration_report.json")
-            with open(report_path, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            with open(report_path, 'wb') as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
             
-            logger.info(f"Extracted {len(short_samples)} short audio samples.")
-            return short_samples
+            logger.info(f"Extracted {len(samples)} short audio samples.")
+            return [sample for sample, _ in samples]
             
         except Exception as e:
             logger.error(f"Error extracting short samples: {e}")
@@ -4,13 +4,39 @@ Text processing module for the CloneIA project.
 """
 import os
 import re
+import copy
 import logging
+import itertools
 from typing import Dict, List, Optional, Tuple, Any
 
 from core.utils import optimize_text
 
 logger = logging.getLogger('cloneia.text')
 
+# Single-character punctuation handled by optimize_for_speech: ! and ? are dropped, ; and : become spaces
+_PUNCTUATION_TABLE = str.maketrans({'!': None, '?': None, ';': ' ', ':': ' '})
+
+# Punctuation patterns used by optimize_for_speech, compiled once at import
+_ELLIPSIS_RE = re.compile(r'\.{3,}')
+_COMMA_SPACE_RE = re.compile(r',\s+')
+_PERIOD_SPACE_RE = re.compile(r'\.\s+')
+_NUMBER_COMMA_RE = re.compile(r'(\d),(\d)')
+
+# Whitespace after a sentence-ending mark, where split_long_text may cut the text
+_SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Numbered news line in a script ("1. ...")
+_NEWS_LINE_RE = re.compile(r'^\d+\.\s+')
+
+# Non-blank script line, without its surrounding whitespace
+_SCRIPT_LINE_RE = re.compile(r'^[^\S\n]*(\S(?:.*\S)?)', re.MULTILINE)
+
+# Natural break points and their replacements (a hyphen adds a subtle pause)
+_BREAK_PATTERNS = [
+    (re.compile(r'\s+' + word + r'\s+', re.IGNORECASE), f' {word}- ')
+    for word in ('mas', 'e', 'então', 'porém')
+]
+
 class TextProcessor:
     """
     Class for processing and optimizing text for speech synthesis.
@@ -56,6 +82,14 @@ class TextProcessor:
             (r"fala\s+galera", "FALAGALERA")
         ]
 
+        # Built-in tables, the only ones whose passes are known to give the same result when fused
+        self._default_tables = (
+            copy.copy(self.greeting_patterns), copy.copy(self.crypto_terms), copy.copy(self.emphasis_words)
+        )
+
+        # Substitution patterns, compiled from the tables above (recompiled if the tables change)
+        self._compile_patterns()
+
         logger.info("TextProcessor initialized")
 
     def optimize_for_speech(self, text: str) -> str:
@@ -71,47 +105,101 @@ class TextProcessor:
         if not text:
             return text
 
+        # The tables are public and may be customized: recompile if they changed since the last call
+        if self._compiled_tables != (self.greeting_patterns, self.crypto_terms, self.emphasis_words):
+            self._compile_patterns()
+
         # Make a copy of the original text
         optimized = text
 
         # Replace greetings with more fluid versions
-        for pattern, replacement in self.greeting_patterns:
-            optimized = re.sub(pattern, replacement, optimized, flags=re.IGNORECASE)
+        for pattern, replacement in self._greeting_passes:
+            optimized = pattern.sub(replacement, optimized)
 
         # Selectively replace punctuation to maintain some natural flow
         # Keep some punctuation for rhythm but remove those that cause awkward pauses
-        optimized = re.sub(r'[!?]', '', optimized)  # Remove exclamation and question marks completely
-        optimized = re.sub(r'\.{3,}', '', optimized)  # Remove ellipses
-        optimized = re.sub(r'[;:]', ' ', optimized)  # Replace semicolons and colons with spaces
+        optimized = optimized.translate(_PUNCTUATION_TABLE)  # Remove ! and ?, replace ; and : with spaces
+        optimized = _ELLIPSIS_RE.sub('', optimized)  # Remove ellipses
 
         # Replace commas and periods with spaces only when they would cause unnatural pauses
-        optimized = re.sub(r',\s+', ' ', optimized)  # Replace ", " with space
-        optimized = re.sub(r'\.\s+', ' ', optimized)  # Replace ". " with space
+        optimized = _COMMA_SPACE_RE.sub(' ', optimized)  # Replace ", " with space
+        optimized = _PERIOD_SPACE_RE.sub(' ', optimized)  # Replace ". " with space
 
         # Keep commas and periods that are part of numbers
-        optimized = re.sub(r'(\d),(\d)', r'\1\2', optimized)  # Remove commas in numbers
+        optimized = _NUMBER_COMMA_RE.sub(r'\1\2', optimized)  # Remove commas in numbers
 
         # Add subtle pauses with hyphens at natural break points
-        optimized = re.sub(r'\s+mas\s+', ' mas- ', optimized, flags=re.IGNORECASE)
-        optimized = re.sub(r'\s+e\s+', ' e- ', optimized, flags=re.IGNORECASE)
-        optimized = re.sub(r'\s+então\s+', ' então- ', optimized, flags=re.IGNORECASE)
-        optimized = re.sub(r'\s+porém\s+', ' porém- ', optimized, flags=re.IGNORECASE)
-
-        # Replace crypto terms for better pronunciation
-        for term, pronunciation in self.crypto_terms.items():
-            # Use word boundaries to avoid replacing parts of words
-            optimized = re.sub(r'\b' + re.escape(term) + r'\b', pronunciation, optimized)
-
-        # Emphasize certain words
-        for word in self.emphasis_words:
-            # Use word boundaries to avoid replacing parts of words
-            pattern = r'\b' + re.escape(word) + r'\b'
-            replacement = word.upper()
-            optimized = re.sub(pattern, replacement, optimized, flags=re.IGNORECASE)
+        for pattern, replacement in _BREAK_PATTERNS:
+            optimized = pattern.sub(replacement, optimized)
+
+        # Replace crypto terms for better pronunciation and emphasize certain words
+        # (word boundaries avoid replacing parts of words)
+        for pattern, replacement in self._term_passes:
+            optimized = pattern.sub(replacement, optimized)
 
         logger.debug(f"Optimized text: {optimized[:50]}...")
         return optimized
 
+    def _compile_patterns(self) -> None:
+        """
+        Compile the greeting, crypto-term and emphasis substitutions from the current tables.
+
+        With the built-in tables the greetings are fused into one alternation and the crypto terms
+        and emphasis words into another. Customized tables are applied one pattern after the other,
+        since overlapping or chained entries (a replacement matched by a later pattern) give a
+        different result when fused.
+        """
+        greeting_patterns = copy.copy(self.greeting_patterns)
+        crypto_terms = copy.copy(self.crypto_terms)
+        emphasis_words = copy.copy(self.emphasis_words)
+        self._compiled_tables = (greeting_patterns, crypto_terms, emphasis_words)
+        default_greetings = greeting_patterns == self._default_tables[0]
+        default_terms = (crypto_terms, emphasis_words) == self._default_tables[1:]
+
+        # Greetings: one alternation with a named group per pattern
+        greetings = [(re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in greeting_patterns]
+        if default_greetings:
+            replacements = {f"g{index}": replacement for index, (_, replacement) in enumerate(greeting_patterns)}
+            fused = re.compile(
+                '|'.join(f"(?P<g{index}>{pattern})" for index, (pattern, _) in enumerate(greeting_patterns)),
+                re.IGNORECASE
+            )
+            self._greeting_passes = [(fused, lambda match: replacements[match.lastgroup])]
+        else:
+            self._greeting_passes = greetings
+
+        # Crypto terms (case-sensitive) and emphasis words (case-insensitive), longest first
+        crypto = '|'.join(map(re.escape, sorted(crypto_terms, key=len, reverse=True)))
+        emphasis = '|'.join(map(re.escape, sorted(emphasis_words, key=len, reverse=True)))
+        crypto_re = re.compile(r'\b(?:' + crypto + r')\b') if crypto_terms else None
+        emphasis_re = re.compile(r'\b(?:' + emphasis + r')\b', re.IGNORECASE) if emphasis_words else None
+
+        # One scan for both
+        if default_terms:
+            fused = re.compile(r'\b(?:(?P<crypto>' + crypto + r')|(?P<emphasis>(?i:' + emphasis + r')))\b')
+            self._term_passes = [(fused, self._replace_term)]
+        else:
+            self._term_passes = [
+                (pattern, replacement) for pattern, replacement in (
+                    (crypto_re, lambda match: crypto_terms[match.group(0)]),
+                    (emphasis_re, lambda match: match.group(0).upper())
+                ) if pattern is not None
+            ]
+
+    def _replace_term(self, match: re.Match) -> str:
+        """
+        Replacement for a crypto term or an emphasis word matched by the fused term alternation.
+
+        Args:
+            match: Term match
+
+        Returns:
+            str: Pronunciation of the crypto term, or the emphasis word in uppercase
+        """
+        if match.lastgroup == "crypto":
+            return self._compiled_tables[1][match.group(0)]
+        return match.group(0).upper()
+
     def parse_script(self, script_content: str) -> Dict[str, Any]:
         """
         Parse a script into sections (intro, news items, outro).
@@ -122,7 +210,6 @@ class TextProcessor:
         Returns:
             Dict[str, Any]: Parsed script with sections
         """
-        lines = script_content.strip().split('\n')
         intro_lines = []
         news_items = []
         outro_lines = []
@@ -130,13 +217,12 @@ class TextProcessor:
         current_section = 'intro'
         current_news = None
 
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
+        # One scan over the script yields each non-blank line, already stripped
+        for match in _SCRIPT_LINE_RE.finditer(script_content):
+            line = match.group(1)
 
             # Check if it's a numbered news line
-            if re.match(r'^\d+\.\s+', line):
+            if _NEWS_LINE_RE.match(line):
                 current_section = 'news'
                 if current_news:
                     news_items.append(current_news)
@@ -221,18 +307,26 @@ class TextProcessor:
             return [text]
 
         chunks = []
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        current_chunk = ""
-
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= max_length:
-                current_chunk += sentence + " "
+        current_sentences = []
+        current_length = 0  # length of the chunk with a space after each sentence
+
+        # Walk the sentence boundaries in one pass, slicing each sentence out of the text
+        start = 0
+        for boundary in itertools.chain(_SENTENCE_BREAK_RE.finditer(text), (None,)):
+            sentence = text[start:boundary.start()] if boundary else text[start:]
+            if boundary:
+                start = boundary.end()
+
+            if current_length + len(sentence) <= max_length:
+                current_sentences.append(sentence)
+                current_length += len(sentence) + 1
             else:
-                chunks.append(current_chunk.strip())
-                current_chunk = sentence + " "
+                chunks.append(" ".join(current_sentences).strip())
+                current_sentences = [sentence]
+                current_length = len(sentence) + 1
 
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if current_sentences:
+            chunks.append(" ".join(current_sentences).strip())
 
         return chunks
 
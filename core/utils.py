@@ -3,10 +3,13 @@
 Utility functions for the CloneIA project.
 """
 import os
+import re
 import json
+import time
 import platform
 import subprocess
 import logging
+from types import MappingProxyType
 from typing import Dict, Optional, Any, List, Union
 
 # Configure logging
@@ -180,6 +183,51 @@ def open_audio_file(file_path: str) -> bool:
         logger.error(f"Error opening audio file: {e}")
         return False
 
+# Introductions replaced by optimize_text for maximum energy (lowercase prefix, replacement)
+_INTROS = (
+    ("e aí cambada", "EAÍCAMBADA"),
+    ("fala cambada", "FALACAMBADA")
+)
+
+# Punctuation removed by optimize_text because it causes pauses
+_PAUSE_PUNCTUATION = str.maketrans('', '', ',.!?;:')
+
+# Terms replaced for better pronunciation by optimize_text
+_PRONUNCIATIONS = MappingProxyType({
+    "Bitcoin": "Bitcoim",
+    "Ethereum": "Etherium",
+    "Cardano": "Cardâno",
+    "Solana": "Solâna",
+    "Polkadot": "Polcadot",
+    "Binance": "Bináns",
+    "Coinbase": "Cóinbeis",
+    "NFT": "ÊnÊfeTê",
+    "DeFi": "DêFai",
+    "staking": "stêiking",
+    "blockchain": "blókcheim",
+    "wallet": "wólet",
+    "token": "tôken",
+    "altcoin": "ôltcoin",
+    "mining": "máining",
+    "miner": "máiner"
+})
+
+# Keywords written in uppercase for emphasis by optimize_text (lowercase or capitalized occurrences)
+_EMPHASIS_WORDS = (
+    "bombando", "muito", "super", "mega", "alta", "subindo",
+    "disparou", "explodiu", "recorde", "máxima", "forte",
+    "incrível", "enorme", "gigante", "absurdo", "impressionante",
+    "surpreendente", "extraordinário", "fenomenal", "espetacular"
+)
+
+# One alternation per table (longest first): the text is scanned once instead of once per term
+_PRONUNCIATION_RE = re.compile('|'.join(map(re.escape, sorted(_PRONUNCIATIONS, key=len, reverse=True))))
+_EMPHASIS_RE = re.compile('|'.join(
+    re.escape(form)
+    for word in sorted(_EMPHASIS_WORDS, key=len, reverse=True)
+    for form in (word, word.capitalize())
+))
+
 def optimize_text(text: str) -> str:
     """
     Optimize text for natural speech.
@@ -200,51 +248,20 @@ def optimize_text(text: str) -> str:
     if not text:
         return text
 
-    # Replace introduction for maximum energy
-    if text.lower().startswith("e aí cambada"):
-        text = "EAÍCAMBADA" + text[len("e aí cambada"):]
-    elif text.lower().startswith("fala cambada"):
-        text = "FALACAMBADA" + text[len("fala cambada"):]
+    # Replace introduction for maximum energy (only the prefix is lowercased and compared)
+    for intro, replacement in _INTROS:
+        if text[:len(intro)].lower() == intro:
+            text = replacement + text[len(intro):]
+            break
 
-    # Remove excessive punctuation that causes pauses
-    for char in [',', '.', '!', '?', '...', ';', ':']:
-        text = text.replace(char, '')
+    # Remove excessive punctuation that causes pauses (ellipses included, dot by dot)
+    text = text.translate(_PAUSE_PUNCTUATION)
 
     # Replace terms for better pronunciation
-    replacements = {
-        "Bitcoin": "Bitcoim",
-        "Ethereum": "Etherium",
-        "Cardano": "Cardâno",
-        "Solana": "Solâna",
-        "Polkadot": "Polcadot",
-        "Binance": "Bináns",
-        "Coinbase": "Cóinbeis",
-        "NFT": "ÊnÊfeTê",
-        "DeFi": "DêFai",
-        "staking": "stêiking",
-        "blockchain": "blókcheim",
-        "wallet": "wólet",
-        "token": "tôken",
-        "altcoin": "ôltcoin",
-        "mining": "máining",
-        "miner": "máiner"
-    }
-
-    for original, replacement in replacements.items():
-        text = text.replace(original, replacement)
+    text = _PRONUNCIATION_RE.sub(lambda match: _PRONUNCIATIONS[match.group(0)], text)
 
     # Use uppercase for emphasis on keywords
-    emphasis_words = [
-        "bombando", "muito", "super", "mega", "alta", "subindo",
-        "disparou", "explodiu", "recorde", "máxima", "forte",
-        "incrível", "enorme", "gigante", "absurdo", "impressionante",
-        "surpreendente", "extraordinário", "fenomenal", "espetacular"
-    ]
-
-    for word in emphasis_words:
-        if word in text.lower():
-            text = text.replace(word, word.upper())
-            text = text.replace(word.capitalize(), word.upper())
+    text = _EMPHASIS_RE.sub(lambda match: match.group(0).upper(), text)
 
     logger.debug(f"Optimized text: {text[:50]}...")
     return text
@@ -308,10 +325,7 @@ def get_timestamp_filename(prefix: str, extension: str) -> str:
     Returns:
         str: Generated filename
     """
-    import time
-    from datetime import datetime
-
-    timestamp = int(time.time())
-    date_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # time.strftime formats the struct_time directly, without building a datetime
+    date_str = time.strftime("%Y%m%d_%H%M%S", time.localtime())
 
     return f"{prefix}_{date_str}.{extension}"
@@ -0,0 +1,112 @@
+"""
+Política de retentativas compartilhada pelas chamadas às APIs da OpenAI e da ElevenLabs.
+"""
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+import requests
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Número máximo de tentativas por requisição
+MAX_ATTEMPTS = 3
+
+# Espera exponencial com jitter (1, 2, 4, 8... segundos, até 16)
+_exponential_wait = wait_exponential_jitter(initial=1, max=16)
+
+
+def _is_retryable(exception):
+    """
+    Indica se a exceção corresponde a uma falha transitória (timeout, 429 ou 5xx).
+
+    Args:
+        exception (BaseException): Exceção levantada pela requisição.
+
+    Returns:
+        bool: True se a requisição deve ser repetida.
+    """
+    if isinstance(exception, (requests.Timeout, httpx.TimeoutException)):
+        return True
+
+    if isinstance(exception, (requests.HTTPError, httpx.HTTPStatusError)):
+        response = getattr(exception, "response", None)
+        if response is not None:
+            return response.status_code == 429 or response.status_code >= 500
+
+    return False
+
+
+def parse_retry_after(value):
+    """
+    Converte o cabeçalho `Retry-After` em segundos.
+
+    Args:
+        value (str): Valor do cabeçalho (segundos ou data HTTP).
+
+    Returns:
+        float: Segundos de espera, ou None se o valor for inválido.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _wait(retry_state):
+    """
+    Calcula a espera antes da próxima tentativa, respeitando `Retry-After` quando presente.
+
+    Args:
+        retry_state (tenacity.RetryCallState): Estado da tentativa atual.
+
+    Returns:
+        float: Segundos de espera.
+    """
+    exception = retry_state.outcome.exception()
+    response = getattr(exception, "response", None)
+    if response is not None:
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+
+    return _exponential_wait(retry_state)
+
+
+def _log_retry(retry_state):
+    """
+    Informa a próxima tentativa.
+
+    Args:
+        retry_state (tenacity.RetryCallState): Estado da tentativa atual.
+    """
+    logger.warning(
+        f"Falha transitória na API ({retry_state.outcome.exception()}). "
+        f"Nova tentativa em {retry_state.next_action.sleep:.1f}s "
+        f"({retry_state.attempt_number}/{MAX_ATTEMPTS})..."
+    )
+
+
+# Decorador para funções (síncronas ou assíncronas) que fazem requisições HTTP
+retry_on_transient_errors = retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=_wait,
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    before_sleep=_log_retry,
+    reraise=True,
+)
@@ -204,10 +204,21 @@ class RapidinhaCryptoGenerator:
         # Transição para as notícias
         script += random.choice(self.style["transicao"]) + "\n\n"
 
+        # Gerar as explicações de IA que faltam agrupando várias notícias por requisição
+        ai_explanations = {}
+        if use_ai:
+            ai_news = [news for news in top_news if news["title"] not in self.explanations]
+            if ai_news:
+                batch = self.ai_explainer.get_explanations_multiplexed(ai_news)
+                ai_explanations = {news["title"]: explanation for news, explanation in zip(ai_news, batch)}
+
         # Explicação de cada notícia
         for i, news in enumerate(top_news, 1):
             script += f"{i}. {news['title']}\n"
-            script += self.generate_explanation(news, use_ai=use_ai) + "\n\n"
+            explanation = ai_explanations.get(news["title"])
+            if explanation is None:
+                explanation = self.generate_explanation(news, use_ai=use_ai)
+            script += explanation + "\n\n"
 
         # Conclusão e despedida
         script += random.choice(self.style["conclusao"]) + " "
@@ -283,6 +294,10 @@ class RapidinhaCryptoGenerator:
 
 if __name__ == "__main__":
     import argparse
+    import logging
+
+    # Exibir as mensagens de progresso do explicador de IA
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     # Configurar argumentos de linha de comando
     parser = argparse.ArgumentParser(
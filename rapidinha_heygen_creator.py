@@ -4,6 +4,7 @@ Criador de vídeos para o quadro "Rapidinha Cripto" usando o HeyGen
 """
 import os
 import argparse
+import logging
 import sys
 from datetime import datetime
 from rapidinha_generator_ai import RapidinhaCryptoGenerator
@@ -152,6 +153,9 @@ def main():
     """
     Função principal que coordena o fluxo da aplicação.
     """
+    # Exibir as mensagens de progresso dos geradores de áudio e de explicações
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     parser = argparse.ArgumentParser(
         description="Criador de vídeos para o quadro 'Rapidinha Cripto' usando o HeyGen",
         formatter_class=argparse.RawTextHelpFormatter
@@ -129,6 +129,52 @@ class SampleExtractor:
         
         return samples
     
+    def clone_from_short_samples(self, source_dir: Optional[str] = None,
+                                 output_dir: Optional[str] = None,
+                                 min_duration: float = 7.0,
+                                 max_duration: float = 12.0,
+                                 num_samples: int = 40,
+                                 voice_name: str = "Rapidinha Voice",
+                                 dry_run: bool = False) -> Optional[str]:
+        """
+        Extract short audio samples and clone a voice from them, uploading while extraction runs.
+        
+        Args:
+            source_dir: Directory containing source audio files (if None, uses default)
+            output_dir: Directory to save short samples (if None, uses default)
+            min_duration: Minimum duration of each sample in seconds
+            max_duration: Maximum duration of each sample in seconds
+            num_samples: Number of samples to extract
+            voice_name: Name of the voice to create
+            dry_run: If True, simulates the cloning without making API calls
+            
+        Returns:
+            Optional[str]: ID of the cloned voice, or None if failed
+        """
+        if not source_dir:
+            source_dir = os.path.join(self.reference_dir, "voice_samples")
+        
+        if not output_dir:
+            output_dir = self.short_samples_dir
+        
+        # Check if the source directory exists
+        if not os.path.exists(source_dir):
+            print(f"Error: Source directory not found: {source_dir}")
+            return None
+        
+        # Extract and upload in a single pipeline
+        voice_id = self.audio_generator.clone_from_samples(
+            source_dir, output_dir, min_duration, max_duration, num_samples, voice_name, dry_run
+        )
+        
+        # Display results
+        if voice_id:
+            print(f"Voice '{voice_name}' cloned. ID: {voice_id}")
+        else:
+            print("Voice cloning failed.")
+        
+        return voice_id
+    
     def analyze_samples(self, samples_dir: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze audio samples.
@@ -213,6 +259,7 @@ def main():
     parser = argparse.ArgumentParser(description="Audio sample extraction tool for CloneIA")
     parser.add_argument("--extract", action="store_true", help="Extract audio samples from videos")
     parser.add_argument("--extract-short", action="store_true", help="Extract short audio samples")
+    parser.add_argument("--clone", action="store_true", help="Extract short audio samples and clone a voice from them")
     parser.add_argument("--analyze", action="store_true", help="Analyze audio samples")
     parser.add_argument("--video-dir", help="Directory containing videos")
     parser.add_argument("--output-dir", help="Directory to save audio samples")
@@ -223,6 +270,8 @@ def main():
     parser.add_argument("--min-duration", type=float, default=7.0, help="Minimum duration of each short sample in seconds")
     parser.add_argument("--short-duration", type=float, default=12.0, help="Maximum duration of each short sample in seconds")
     parser.add_argument("--num-samples", type=int, default=40, help="Number of short samples to extract")
+    parser.add_argument("--voice-name", default="Rapidinha Voice", help="Name of the cloned voice")
+    parser.add_argument("--dry-run", action="store_true", help="Simulate voice cloning without API calls")
     
     args = parser.parse_args()
     
@@ -247,6 +296,17 @@ def main():
             args.num_samples
         )
     
+    elif args.clone:
+        extractor.clone_from_short_samples(
+            args.source_dir,
+            args.output_dir,
+            args.min_duration,
+            args.short_duration,
+            args.num_samples,
+            args.voice_name,
+            args.dry_run
+        )
+    
     elif args.analyze:
         extractor.analyze_samples(args.samples_dir)
     